@@ -0,0 +1,263 @@
+"""Local aiohttp stand-in for Supabase GoTrue, the four ha-* Edge Functions and Realtime."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import WSMsgType, web
+
+LOCATION_TYPES = ("freezer", "dry", "emergency")
+PRODUCTS = ("Milch", "Reis", "Nudeln", "Bohnen", "Mehl", "Zucker", "Erbsen", "Tomaten", "Butter", "Käse")
+
+
+def _jwt(exp: float) -> str:
+    claims = {"exp": int(exp), "sub": "bench", "jti": uuid.uuid4().hex}
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"bench.{payload}.sig"
+
+
+class FakeSupabase:
+    """Synthetic inventory served the way the Edge Functions return it.
+
+    `latency_s` is added to every request; access tokens expire after
+    `token_ttl_s`, after which function calls answer 401 until refreshed.
+    `mutate` changes one item per location-items request so bodies differ.
+    `fail_next` injects error statuses (with Retry-After) or stalls. The
+    Realtime websocket answers joins, and `push_change` sends row changes.
+    """
+
+    def __init__(
+        self,
+        items: int,
+        locations: int = 8,
+        latency_s: float = 0.0,
+        token_ttl_s: float = 3600,
+        mutate: bool = False,
+        seed: int = 1,
+    ) -> None:
+        self.latency_s = latency_s
+        self.token_ttl_s = token_ttl_s
+        self.mutate = mutate
+        self.requests: Dict[str, int] = {}
+        self.reject_realtime = False
+        self.reject_tokens = False  # GoTrue answers 400 to logins and refreshes
+        self.realtime_messages: List[Dict[str, Any]] = []
+        self._faults: List[Tuple[int, Optional[str], float]] = []  # (status, Retry-After, stall seconds)
+        self._stopping = asyncio.Event()  # ends stalls early on stop
+        self._sockets: Dict[web.WebSocketResponse, str] = {}  # open realtime socket -> joined topic
+        self._valid: Dict[str, float] = {}  # access token -> expiry
+        self._rng = random.Random(seed)
+        self._locations = self._generate(items, locations)
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.url = ""
+
+    # ---------- Data ----------
+    def _generate(self, items: int, locations: int) -> List[Dict[str, Any]]:
+        today = date.today()
+        locs = [
+            {
+                "id": str(uuid.UUID(int=self._rng.getrandbits(128))),
+                "location_name": f"Location {i}",
+                "location_type": LOCATION_TYPES[i % len(LOCATION_TYPES)],
+                "note": None,
+                "attributes": {"items": []},
+            }
+            for i in range(max(1, locations))
+        ]
+        for n in range(items):
+            loc = locs[n % len(locs)]
+            expires = today + timedelta(days=self._rng.randint(-5, 400))
+            loc["attributes"]["items"].append(
+                {
+                    "id": n + 1,
+                    "name": f"{self._rng.choice(PRODUCTS)} {n}",
+                    "quantity": self._rng.randint(1, 6),
+                    "unit": "pcs",
+                    "brand": "Bench",
+                    "expires": expires.isoformat(),
+                    "verbrauchen_bis": expires.isoformat(),
+                    "location_id": loc["id"],
+                    "updated_at": "2025-01-01T00:00:00Z",
+                    "barcode": "0000000000000",
+                }
+            )
+        return locs
+
+    def _all_items(self) -> List[Dict[str, Any]]:
+        return [item for loc in self._locations for item in loc["attributes"]["items"]]
+
+    def _touch(self) -> None:
+        items = self._all_items()
+        if items:
+            item = self._rng.choice(items)
+            item["quantity"] = self._rng.randint(1, 6)
+            item["updated_at"] = f"2025-01-01T00:00:{self._rng.randint(0, 59):02d}Z"
+
+    # ---------- Handlers ----------
+    async def _delay(self, request: web.Request) -> None:
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+
+    def _issue(self) -> Dict[str, Any]:
+        exp = time.time() + self.token_ttl_s
+        token = _jwt(exp)
+        self._valid[token] = exp
+        return {
+            "access_token": token,
+            "refresh_token": uuid.uuid4().hex,
+            "expires_in": int(self.token_ttl_s),
+            "expires_at": int(exp),
+        }
+
+    def revoke_tokens(self) -> None:
+        """Expire all issued access tokens now (forces the client's 401 -> refresh path)."""
+        self._valid.clear()
+
+    async def _token(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        if self.reject_tokens:
+            if request.query.get("grant_type") == "refresh_token":
+                body = {"code": 400, "error_code": "refresh_token_not_found", "msg": "Invalid Refresh Token"}
+            else:
+                body = {"code": 400, "error_code": "invalid_credentials", "msg": "Invalid login credentials"}
+            return web.json_response(body, status=400)
+        return web.json_response(self._issue())
+
+    def _authorized(self, request: web.Request) -> bool:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        exp = self._valid.get(token)
+        return exp is not None and exp > time.time()
+
+    def fail_next(
+        self, status: int = 503, count: int = 1, retry_after: Optional[str] = None, stall_s: float = 0.0
+    ) -> None:
+        """Answer the next `count` function calls with `status` (0: serve normally) after stalling `stall_s`."""
+        self._faults += [(status, retry_after, stall_s)] * count
+
+    async def _function(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        if self._faults:
+            status, retry_after, stall_s = self._faults.pop(0)
+            if stall_s:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), stall_s)
+                except asyncio.TimeoutError:
+                    pass
+            if status:
+                headers = {"Retry-After": retry_after} if retry_after is not None else None
+                return web.json_response({"error": "injected"}, status=status, headers=headers)
+        if not self._authorized(request):
+            return web.json_response({"error": "JWT expired"}, status=401)
+        name = request.match_info["name"]
+        if name == "ha-location-items":
+            if self.mutate:
+                self._touch()
+            body = {"state": len(self._locations), "total_locations": len(self._locations),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "locations": self._locations}
+        elif name == "ha-inventory-summary":
+            total = sum(len(loc["attributes"]["items"]) for loc in self._locations)
+            body = {"state": total, "attributes": {"total_items": total, "unit_of_measurement": "items"}}
+        elif name == "ha-expiring-items":
+            last = (date.today() + timedelta(days=int(request.query.get("days", 7)))).isoformat()
+            items = [i for i in self._all_items() if i["expires"] <= last]
+            body = {"state": len(items), "attributes": {"items": items}}
+        elif name == "ha-location-status":
+            locs = [
+                {"id": loc["id"], "name": loc["location_name"], "type": loc["location_type"],
+                 "total_items": len(loc["attributes"]["items"])}
+                for loc in self._locations
+            ]
+            body = {"state": len(locs), "attributes": {"total_locations": len(locs), "locations": locs}}
+        else:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(body)
+
+    # ---------- Realtime ----------
+    async def _realtime(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets[ws] = ""
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    break
+                message = msg.json()
+                self.realtime_messages.append(message)
+                if message.get("event") == "phx_join":
+                    self._sockets[ws] = message["topic"]
+                    status = "error" if self.reject_realtime else "ok"
+                    await ws.send_json(
+                        {"topic": message["topic"], "event": "phx_reply", "ref": message.get("ref"),
+                         "payload": {"status": status, "response": {}}}
+                    )
+        finally:
+            self._sockets.pop(ws, None)
+        return ws
+
+    async def push_change(self, table: str, change_type: str = "UPDATE") -> None:
+        """Send a postgres_changes event to every joined realtime socket."""
+        for ws, topic in list(self._sockets.items()):
+            if topic:
+                await ws.send_json(
+                    {"topic": topic, "event": "postgres_changes", "ref": None,
+                     "payload": {"data": {"table": table, "type": change_type}}}
+                )
+
+    async def drop_realtime(self) -> None:
+        """Close all realtime sockets (the client should reconnect)."""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    # ---------- Lifecycle ----------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/auth/v1/token", self._token)
+        app.router.add_get("/functions/v1/{name}", self._function)
+        app.router.add_get("/realtime/v1/websocket", self._realtime)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        await self.drop_realtime()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self) -> str:
+        """Serve from a separate thread/loop so server-side JSON work does not show up as client loop blocking."""
+        ready = threading.Event()
+
+        def _run() -> None:
+            loop = self._loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self._thread = threading.Thread(target=_run, name="fake-supabase", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop_thread(self) -> None:
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,235 @@
+"""Benchmark the API client, coordinators and sensor attributes against FakeSupabase.
+
+    python bench/run.py --items 10 1000 10000 50000 --latency-ms 20 --output bench_output.txt
+
+Each inventory size prints (and appends to --output) one JSON object with the
+integration's import cost, setup time, poll throughput, event-loop blocking and
+attribute build cost.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import aiohttp  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from bench.fake_supabase import FakeSupabase  # noqa: E402
+from custom_components.vorratskammer.api import VorratskammerAPI  # noqa: E402
+from custom_components.vorratskammer.const import __version__  # noqa: E402
+from custom_components.vorratskammer.coordinator import VorratskammerCoordinator  # noqa: E402
+from custom_components.vorratskammer.metrics import Metrics  # noqa: E402
+from custom_components.vorratskammer.sensor import VorratskammerGenericSensor  # noqa: E402
+
+
+class LoopMonitor:
+    """Measures event-loop blocking as the lateness of a short periodic sleep."""
+
+    def __init__(self, interval_s: float = 0.005) -> None:
+        self._interval = interval_s
+        self._task: asyncio.Task | None = None
+        self.lags_ms: List[float] = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self._interval)
+            self.lags_ms.append(max(0.0, (loop.time() - started - self._interval) * 1000))
+
+    def __enter__(self) -> "LoopMonitor":
+        self.lags_ms = []
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def summary(self) -> Dict[str, Any]:
+        lags = self.lags_ms or [0.0]
+        return {
+            "max_ms": round(max(lags), 2),
+            "total_ms": round(sum(lags), 2),
+            "over_50ms": sum(1 for lag in lags if lag > 50),
+        }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+async def bench_size(args: argparse.Namespace, items: int) -> Dict[str, Any]:
+    fake = FakeSupabase(
+        items,
+        locations=args.locations,
+        latency_s=args.latency_ms / 1000,
+        token_ttl_s=args.token_ttl,
+    )
+    url = fake.start_in_thread()
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="vk-bench-"))
+    session = aiohttp.ClientSession()
+    metrics = Metrics()
+    result: Dict[str, Any] = {"items": items, "locations": args.locations}
+    try:
+        api = VorratskammerAPI(session, url, "bench-anon-key", metrics=metrics)
+        coordinators = {
+            "summary": VorratskammerCoordinator(hass, "summary", 300, api.inventory_summary, metrics=metrics),
+            "locations": VorratskammerCoordinator(hass, "locations", 300, api.location_status, metrics=metrics),
+            "location_items": VorratskammerCoordinator(hass, "location_items", 300, api.location_items, metrics=metrics),
+        }
+
+        # Setup: login plus the first refresh of every poller, as async_setup_entry does
+        with LoopMonitor() as monitor:
+            started = time.perf_counter()
+            await api.login_password("bench@example.com", "bench")
+            await asyncio.gather(*(c.async_refresh() for c in coordinators.values()))
+            result["setup_ms"] = _ms(time.perf_counter() - started)
+        result["setup_loop_blocking"] = monitor.summary()
+        if not all(c.last_update_success for c in coordinators.values()):
+            raise RuntimeError(f"First refresh failed: {[c.last_exception for c in coordinators.values()]}")
+
+        coordinator = coordinators["location_items"]
+        for phase, mutate in (("poll_unchanged", False), ("poll_changed", True)):
+            fake.mutate = mutate
+            durations = []
+            with LoopMonitor() as monitor:
+                started = time.perf_counter()
+                for poll in range(args.polls):
+                    if args.revoke_every and poll % args.revoke_every == args.revoke_every - 1:
+                        fake.revoke_tokens()
+                    poll_started = time.perf_counter()
+                    await coordinator.async_refresh()
+                    durations.append(time.perf_counter() - poll_started)
+                elapsed = time.perf_counter() - started
+            result[phase] = {
+                "polls": args.polls,
+                "polls_per_s": round(args.polls / elapsed, 2),
+                "median_ms": _ms(statistics.median(durations)),
+                "max_ms": _ms(max(durations)),
+                "failures": 0 if coordinator.last_update_success else 1,
+                "loop_blocking": monitor.summary(),
+            }
+
+        # Attribute build: cold (new payload) and warm (cached per payload identity)
+        sensor = VorratskammerGenericSensor(
+            coordinator, "bench", "location_items", "Bench", "locations", "mdi:test-tube", metrics
+        )
+        cold = []
+        for _ in range(args.attr_repeats):
+            sensor._attrs_source = None
+            started = time.perf_counter()
+            attrs = sensor.extra_state_attributes
+            cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for _ in range(args.attr_repeats):
+            sensor.extra_state_attributes  # noqa: B018
+        warm = (time.perf_counter() - started) / args.attr_repeats
+        result["attributes"] = {
+            "cold_median_ms": _ms(statistics.median(cold)),
+            "cold_max_ms": _ms(max(cold)),
+            "warm_ms": _ms(warm),
+            "json_bytes": len(json.dumps(attrs, default=str)),
+        }
+
+        result["server_requests"] = fake.requests
+        result["metrics"] = {
+            "token_refreshes": metrics.token_refreshes,
+            "unauthorized": metrics.unauthorized,
+            "retries": metrics.retries,
+            "endpoints": {
+                path: {
+                    "p50_ms": stats.latency.percentile(0.5),
+                    "p95_ms": stats.latency.percentile(0.95),
+                    "bytes_last": stats.bytes_last,
+                    "items_last": stats.items_last,
+                    "not_modified": stats.not_modified,
+                }
+                for path, stats in metrics.endpoints.items()
+            },
+        }
+        api.cancel_pending()
+    finally:
+        await session.close()
+        fake.stop_thread()
+        await hass.async_stop(force=True)
+    return result
+
+
+# Modules Home Assistant has already imported by the time it loads the integration
+_HA_PRELOADED = (
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.config_entries",
+    "homeassistant.components.sensor",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.start",
+)
+
+
+def import_probe() -> Dict[str, float]:
+    """Cold import cost of the integration on top of the HA modules it builds on."""
+    code = (
+        "import time, importlib\n"
+        f"for m in {_HA_PRELOADED!r}: importlib.import_module(m)\n"
+        "t = time.perf_counter()\n"
+        "import custom_components.vorratskammer\n"
+        "setup = time.perf_counter() - t\n"
+        "import custom_components.vorratskammer.sensor\n"
+        "print(setup * 1000, (time.perf_counter() - t) * 1000)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    package_ms, with_sensor_ms = (float(v) for v in out.stdout.split())
+    return {"package_ms": round(package_ms, 2), "with_sensor_platform_ms": round(with_sensor_ms, 2)}
+
+
+async def main(args: argparse.Namespace) -> int:
+    meta = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "latency_ms": args.latency_ms,
+        "token_ttl_s": args.token_ttl,
+        "revoke_every": args.revoke_every,
+        "import": import_probe(),
+    }
+    for items in args.items:
+        record = {**meta, **await bench_size(args, items)}
+        line = json.dumps(record, sort_keys=True)
+        print(line)
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as out:
+                out.write(line + "\n")
+    return 0
+
+
+def _parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1000, 10000, 50000])
+    parser.add_argument("--locations", type=int, default=8)
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--attr-repeats", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every fake request")
+    parser.add_argument("--token-ttl", type=float, default=3600, help="seconds until access tokens expire")
+    parser.add_argument("--revoke-every", type=int, default=0, help="revoke access tokens every N polls")
+    parser.add_argument("--output", help="append one JSON line per inventory size to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(_parse_args())))
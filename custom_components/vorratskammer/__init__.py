@@ -2,12 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any
+import random
+import time
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed
-from homeassistant.helpers import aiohttp_client
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later, async_track_time_change
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
 
 from .api import VorratskammerAPI, RefreshTokenInvalid
 from .const import (
@@ -17,23 +22,84 @@ from .const import (
     CONF_ANON_KEY,
     CONF_DAYS_AHEAD,
     CONF_SCAN_SUMMARY,
-    CONF_SCAN_EXPIRING,
     CONF_SCAN_LOCATIONS,
+    CONF_SNAPSHOT_MODE,
+    CONF_DELTA_SYNC,
+    CONF_REALTIME,
+    CONF_REALTIME_TABLES,
+    CONF_ADAPTIVE_POLLING,
+    CONF_REQUEST_TIMEOUT,
     DEFAULT_DAYS_AHEAD,
+    DEFAULT_SNAPSHOT_MODE,
+    DEFAULT_DELTA_SYNC,
+    DEFAULT_REALTIME,
+    DEFAULT_REALTIME_TABLES,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_REQUEST_TIMEOUT,
+    ADAPTIVE_MIN_INTERVAL,
+    ADAPTIVE_MAX_FACTOR,
+    DELTA_RESYNC_INTERVAL,
+    REALTIME_SAFETY_INTERVAL,
+    RESPONSE_CACHE_TTL,
+    STARTUP_DEFER_JITTER,
 )
-from .coordinator import VorratskammerCoordinator
+from .cache import SnapshotCache
+from .coordinator import AdaptiveInterval, SnapshotViewCoordinator, VorratskammerCoordinator
+from .manager import async_get_manager, async_release_manager
+from .metrics import Metrics
+from .services import async_setup_services
+from .snapshot import ExpiryIndex, derive_expiring, derive_location_status, derive_summary, has_imminent_expiry
 
 _LOGGER = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from .realtime import RealtimeClient
+
 PLATFORMS = ["sensor"]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Polling coordinator -> entry.data key of its scan interval
+POLLER_SCAN_KEYS = {
+    "summary": CONF_SCAN_SUMMARY,
+    "locations": CONF_SCAN_LOCATIONS,
+    "location_items": CONF_SCAN_LOCATIONS,
+}
+
+# Realtime table -> pollers whose payload it feeds; other tables refresh every poller.
+# A deleted location's items arrive as their own item changes, so the summary
+# (item totals) does not need to follow location rows.
+REALTIME_TABLE_POLLERS = {
+    "items": ("summary", "locations", "location_items"),
+    "locations": ("locations", "location_items"),
+}
+
+
+async def async_setup(hass: HomeAssistant, config: dict[str, Any]) -> bool:
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    session = aiohttp_client.async_get_clientsession(hass)
+    setup_started = time.monotonic()
     supabase_url: str = entry.data[CONF_SUPABASE_URL]
     anon_key: str = entry.data[CONF_ANON_KEY]
 
-    api = VorratskammerAPI(session, supabase_url, anon_key)
+    # Session, request budget and token refresh timer are shared per Supabase project
+    manager = async_get_manager(hass, supabase_url)
+    entry.async_on_unload(lambda: async_release_manager(hass, supabase_url, entry.entry_id))
+    session = manager.session
+    metrics = Metrics()
+
+    api = VorratskammerAPI(
+        session,
+        supabase_url,
+        anon_key,
+        semaphore=manager.semaphore,
+        response_ttl=RESPONSE_CACHE_TTL,
+        request_timeout=float(entry.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)),
+        metrics=metrics,
+    )
 
     store = hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})
     tokens: dict[str, Any] | None = store.get(STORAGE_TOKENS)
@@ -44,6 +110,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         }
     api.set_tokens(tokens.get("access_token"), tokens.get("refresh_token"))
     store["api"] = api
+    store["metrics"] = metrics
+    entry.async_on_unload(api.cancel_pending)
 
     async def _save_tokens():
         new_tokens = api.export_tokens()
@@ -56,44 +124,139 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 "refresh_token": new_tokens.get("refresh_token"),
             },
         )
+        manager.async_schedule_refresh()
+        if realtime := store.get("realtime"):
+            await realtime.update_token(new_tokens.get("access_token"))
 
     api._on_refresh = _save_tokens  # type: ignore[attr-defined]
 
+    # Refreshed in the background shortly before expiry, coalesced across entries
+    manager.async_register(entry.entry_id, api)
+
     # Build coordinators here (so we can do the first refresh BEFORE forwarding platforms)
     opts = entry.options
     days_ahead = int(opts.get(CONF_DAYS_AHEAD, DEFAULT_DAYS_AHEAD))
 
     scan_summary = int(entry.data.get(CONF_SCAN_SUMMARY))
-    scan_expiring = int(entry.data.get(CONF_SCAN_EXPIRING))
     scan_locations = int(entry.data.get(CONF_SCAN_LOCATIONS))
     scan_location_items = scan_locations  # Use same interval as locations by default
 
-    coord_summary = VorratskammerCoordinator(
-        hass, "Vorratskammer Summary", scan_summary, api.inventory_summary
-    )
-    coord_expiring = VorratskammerCoordinator(
-        hass, "Vorratskammer Expiring", scan_expiring, lambda: api.expiring_items(days_ahead)
-    )
-    coord_locations = VorratskammerCoordinator(
-        hass, "Vorratskammer Locations", scan_locations, api.location_status
-    )
+    snapshot_mode = bool(opts.get(CONF_SNAPSHOT_MODE, DEFAULT_SNAPSHOT_MODE))
+    adaptive_polling = bool(opts.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING))
+
+    def _adaptive(scan_s: int) -> AdaptiveInterval | None:
+        if not adaptive_polling:
+            return None
+        return AdaptiveInterval(scan_s, min(ADAPTIVE_MIN_INTERVAL, scan_s), scan_s * ADAPTIVE_MAX_FACTOR)
+
+    def _urgent(data: dict[str, Any]) -> bool:
+        return has_imminent_expiry(data, dt_util.now().date())
+
+    location_items_fetcher = api.location_items
+    if opts.get(CONF_DELTA_SYNC, DEFAULT_DELTA_SYNC):
+        from .delta import delta_fetcher  # only loaded when enabled
+
+        location_items_fetcher = delta_fetcher(
+            api.location_items, api.location_items_changes, DELTA_RESYNC_INTERVAL
+        )
+
     coord_location_items = VorratskammerCoordinator(
-        hass, "Vorratskammer Location Items", scan_location_items, api.location_items
+        hass,
+        "Vorratskammer Location Items",
+        scan_location_items,
+        location_items_fetcher,
+        adaptive=_adaptive(scan_location_items),
+        urgent=_urgent,
+        metrics=metrics,
     )
 
-    # First refresh BEFORE platform forward — if this fails, raise ConfigEntryNotReady here
-    try:
-        await asyncio.gather(
-            coord_summary.async_config_entry_first_refresh(),
-            coord_expiring.async_config_entry_first_refresh(),
-            coord_locations.async_config_entry_first_refresh(),
-            coord_location_items.async_config_entry_first_refresh(),
+    # Expiring items (and in snapshot mode every other view) are derived from the
+    # location items payload; `settings` is read on every derive so options apply live
+    settings = store.setdefault("settings", {})
+    settings[CONF_DAYS_AHEAD] = days_ahead
+    settings["scan_intervals"] = {
+        key: int(entry.data.get(scan_key)) for key, scan_key in POLLER_SCAN_KEYS.items()
+    }
+    expiry_index = ExpiryIndex()
+
+    def _view(name, derive):
+        return SnapshotViewCoordinator(
+            hass,
+            name,
+            coord_location_items,
+            lambda data: derive(data, settings[CONF_DAYS_AHEAD], dt_util.now().date()),
+            metrics=metrics,
+        )
+
+    coord_expiring = _view(
+        "Vorratskammer Expiring",
+        lambda data, days, today: derive_expiring(data, days, today, expiry_index),
+    )
+    if snapshot_mode:
+        # One fetch of ha-location-items per cycle; the other views are derived locally
+        coord_summary = _view("Vorratskammer Summary", derive_summary)
+        coord_locations = _view("Vorratskammer Locations", derive_location_status)
+        pollers = {"location_items": coord_location_items}
+        views = [coord_summary, coord_expiring, coord_locations]
+    else:
+        coord_summary = VorratskammerCoordinator(
+            hass, "Vorratskammer Summary", scan_summary, api.inventory_summary,
+            adaptive=_adaptive(scan_summary), metrics=metrics,
+        )
+        coord_locations = VorratskammerCoordinator(
+            hass, "Vorratskammer Locations", scan_locations, api.location_status,
+            adaptive=_adaptive(scan_locations), metrics=metrics,
         )
+        pollers = {
+            "summary": coord_summary,
+            "locations": coord_locations,
+            "location_items": coord_location_items,
+        }
+        views = [coord_expiring]
+
+    # Staged startup: cached payloads are restored, and only the summary is fetched
+    # before platforms forward. The heavy pollers load after Home Assistant has started.
+    cache = SnapshotCache(hass, entry.entry_id)
+    cached = await cache.async_load()
+    for key, coordinator in pollers.items():
+        if key in cached:
+            coordinator.async_restore(cached[key])
+    eager = [c for key, c in pollers.items() if key == "summary" and key not in cached]
+    soon = [c for key, c in pollers.items() if key == "summary" and key in cached]
+    deferred = [c for key, c in pollers.items() if key != "summary"]
+
+    # If this fails, raise ConfigEntryNotReady here
+    try:
+        for coordinator in eager:
+            await coordinator.async_config_entry_first_refresh()
+        if "summary" not in pollers and coord_location_items.data is None:
+            # Snapshot mode without a cached payload: one lightweight call until the items arrive
+            coord_summary.async_set_updated_data(await api.inventory_summary())
+        if coord_location_items.data is not None:
+            for view in views:
+                await view.async_config_entry_first_refresh()
     except RefreshTokenInvalid as auth_err:
         raise ConfigEntryAuthFailed(f"Refresh token invalid: {auth_err}") from auth_err
     except Exception as err:
         raise ConfigEntryNotReady(f"Initial data update failed: {err}") from err
 
+    for key, coordinator in pollers.items():
+        entry.async_on_unload(cache.async_track(key, coordinator))
+
+    for view in views:
+        entry.async_on_unload(view.async_start())
+
+    @callback
+    def _rederive_views(_now=None) -> None:
+        for view in views:
+            view.async_rederive()
+
+    # Day rollover: expiry counts change at midnight without any new data
+    entry.async_on_unload(async_track_time_change(hass, _rederive_views, hour=0, minute=0, second=0))
+    store["rederive_views"] = _rederive_views
+    store["pollers"] = pollers
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     store["coordinators"] = {
         "summary": coord_summary,
         "expiring": coord_expiring,
@@ -101,10 +264,118 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "location_items": coord_location_items,
     }
 
+    if opts.get(CONF_REALTIME, DEFAULT_REALTIME):
+        from .realtime import RealtimeClient  # only loaded when enabled
+
+        @callback
+        def _on_change(table: str | None) -> None:
+            # Debounced by each coordinator, so a burst of row changes is one refresh
+            api.invalidate_cache()
+            for key in REALTIME_TABLE_POLLERS.get(table or "", pollers):
+                if (coordinator := pollers.get(key)) is not None:
+                    hass.async_create_task(coordinator.async_request_refresh())
+
+        @callback
+        def _on_health(healthy: bool) -> None:
+            _LOGGER.debug("Realtime socket %s", "healthy" if healthy else "down")
+            _apply_intervals(store)
+            if not healthy:
+                # Catch up on anything missed while the socket was down
+                _on_change(None)
+
+        realtime = RealtimeClient(
+            session,
+            supabase_url,
+            anon_key,
+            str(opts.get(CONF_REALTIME_TABLES, DEFAULT_REALTIME_TABLES)).split(","),
+            lambda: api.export_tokens().get("access_token"),
+            _on_change,
+            _on_health,
+        )
+        store["realtime"] = realtime
+        realtime.start(hass, entry)
+        entry.async_on_unload(realtime.stop)
+
+    # Offset this entry's scheduled polls from other entries of the same project
+    for coordinator in pollers.values():
+        offset = manager.poll_offset(entry.entry_id, coordinator.update_interval.total_seconds())
+        entry.async_on_unload(coordinator.async_delay_polling(offset))
+
+    metrics.startup["blocking_ms"] = round((time.monotonic() - setup_started) * 1000, 1)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    metrics.startup["forward_ms"] = round((time.monotonic() - setup_started) * 1000, 1)
+
+    for coordinator in soon:
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{coordinator.name} refresh")
+
+    async def _async_load_deferred() -> None:
+        await asyncio.gather(*(c.async_refresh() for c in deferred))
+        metrics.startup["deferred_loaded_ms"] = round((time.monotonic() - setup_started) * 1000, 1)
+        _LOGGER.debug("Vorratskammer startup: %s", metrics.startup)
+
+    @callback
+    def _start_deferred(_now: Any) -> None:
+        entry.async_create_background_task(hass, _async_load_deferred(), "Vorratskammer deferred load")
+
+    @callback
+    def _schedule_deferred(_hass: HomeAssistant) -> None:
+        # Jitter spreads the heavy first loads of several entries (and HA's own startup work)
+        delay = random.uniform(0, STARTUP_DEFER_JITTER)
+        metrics.startup["deferred_delay_s"] = round(delay, 1)
+        entry.async_on_unload(async_call_later(hass, delay, _start_deferred))
+
+    if deferred:
+        entry.async_on_unload(async_at_started(hass, _schedule_deferred))
     return True
 
 
+@callback
+def _apply_intervals(store: dict[str, Any]) -> None:
+    """Push the configured scan intervals (or the realtime safety interval) to the pollers."""
+    realtime: RealtimeClient | None = store.get("realtime")
+    healthy = realtime is not None and realtime.healthy
+    intervals = store["settings"]["scan_intervals"]
+    for key, coordinator in store["pollers"].items():
+        base = intervals[key]
+        if healthy:
+            # Pushed changes trigger refreshes; those must not pull polling back below the safety interval
+            safety = max(base, REALTIME_SAFETY_INTERVAL)
+            coordinator.set_base_interval(safety, min_interval_s=safety)
+        else:
+            coordinator.set_base_interval(base)
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply live-tunable options in place; the options flow reloads for the rest."""
+    store = hass.data[DOMAIN].get(entry.entry_id)
+    if not store or "pollers" not in store:
+        return
+    settings = store["settings"]
+
+    days_ahead = int(entry.options.get(CONF_DAYS_AHEAD, DEFAULT_DAYS_AHEAD))
+    if settings.get(CONF_DAYS_AHEAD) != days_ahead:
+        settings[CONF_DAYS_AHEAD] = days_ahead
+        store["rederive_views"]()
+
+    store["api"].set_request_timeout(float(entry.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)))
+
+    changed = []
+    for key, coordinator in store["pollers"].items():
+        scan_s = int(entry.data.get(POLLER_SCAN_KEYS[key]))
+        if settings["scan_intervals"][key] != scan_s:
+            settings["scan_intervals"][key] = scan_s
+            changed.append(coordinator)
+    if changed:
+        _apply_intervals(store)
+        # Refreshing reschedules the next poll on the new interval
+        for coordinator in changed:
+            await coordinator.async_request_refresh()
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await SnapshotCache(hass, entry.entry_id).async_remove()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
@@ -1,22 +1,113 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import hashlib
+import json
 import logging
-from typing import Any, Dict, Optional
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import aiohttp
 
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_TIMEOUT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUEST_TIMEOUT,
+    JSON_EXECUTOR_THRESHOLD,
+    RESPONSE_CACHE_SIZE,
+    RETRY_AFTER_MAX,
+    RETRY_ATTEMPTS,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    TOKEN_REFRESH_MARGIN,
+)
+from .metrics import Metrics, count_items
+from .resilience import CircuitBreaker, CircuitOpenError, TransientError, backoff_delay, parse_retry_after
+from .snapshot import without_volatile
+
+try:  # orjson-backed loader/dumper shipped with Home Assistant
+    from homeassistant.helpers.json import json_bytes as _json_bytes
+    from homeassistant.util.json import json_loads as _json_loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
+    def _json_bytes(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
 _LOGGER = logging.getLogger(__name__)
 
+_UNAUTHORIZED = object()  # returned by _get on 401 so _call can refresh and retry
+
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Failures worth retrying; anything else (4xx, bad JSON) fails the call immediately
+_TRANSIENT_ERRORS = (TransientError, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+_CallKey = Tuple[str, Tuple]
+
+
+def _digest(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def _decode(body: bytes, previous: Optional[bytes]) -> Tuple[bytes, Any]:
+    """Decode a body; returns (content digest, payload), payload None if the content equals `previous`.
+
+    The content digest ignores per-response timestamps, so a payload that only
+    differs in `timestamp`/`last_updated` counts as unchanged.
+    """
+    data = _json_loads(body)
+    content = _digest(_json_bytes(without_volatile(data)))
+    if content == previous:
+        return content, None
+    return content, data
+
 
 class RefreshTokenInvalid(RuntimeError):
     """Raised when the stored refresh token is rejected by Supabase."""
     pass
 
+def _jwt_exp(token: Optional[str]) -> Optional[float]:
+    """Return the `exp` claim of a JWT without verifying it, or None."""
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return None
+
+
+@dataclass
+class _CachedResponse:
+    etag: Optional[str]
+    digest: bytes  # raw body
+    content: bytes  # body without volatile fields
+    data: Any
+
+
 class VorratskammerAPI:
     """Thin client for Supabase auth + Edge Functions."""
 
-    def __init__(self, session: aiohttp.ClientSession, supabase_url: str, anon_key: str):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        supabase_url: str,
+        anon_key: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        response_ttl: float = 0,
+        response_cache_size: int = RESPONSE_CACHE_SIZE,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = RETRY_ATTEMPTS,
+        metrics: Optional[Metrics] = None,
+    ):
         self._session = session
         self._base = supabase_url.rstrip("/")
         self._gotrue = f"{self._base}/auth/v1"
@@ -24,7 +115,24 @@ class VorratskammerAPI:
         self._anon_key = anon_key
         self._access_token = None
         self._refresh_token = None
-        self._lock = asyncio.Lock()
+        self._expires_at: Optional[float] = None  # epoch seconds
+        # Only the token refresh is single-flight; function calls run in parallel
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._rejected_refresh_token: Optional[str] = None  # GoTrue said refresh_token_not_found
+        self._semaphore = semaphore or asyncio.Semaphore(max(1, int(max_concurrency)))
+        # Last response per (path, params) for conditional GETs. An unchanged payload
+        # returns the *same* object, so coordinators can skip the entity update.
+        self._responses: Dict[_CallKey, _CachedResponse] = {}
+        # Concurrent identical calls share one request; optional short TTL cache on top
+        self._inflight: Dict[_CallKey, asyncio.Task] = {}
+        self._ttl = response_ttl
+        self._ttl_size = max(1, response_cache_size)
+        self._ttl_cache: "OrderedDict[_CallKey, Tuple[float, Any]]" = OrderedDict()
+        self._timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self._retries = max(0, int(retries))
+        # One breaker per Edge Function so an outage of one does not block the others
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.metrics = metrics or Metrics()
 
     def _auth_headers(self) -> dict:
         # For GoTrue endpoints
@@ -48,6 +156,31 @@ class VorratskammerAPI:
     def set_tokens(self, access_token: str, refresh_token: Optional[str]):
         self._access_token = access_token
         self._refresh_token = refresh_token
+        self._expires_at = _jwt_exp(access_token)
+
+    def _update_expiry(self, data: Dict[str, Any]) -> None:
+        # Prefer what GoTrue tells us, fall back to the JWT claim
+        if data.get("expires_at"):
+            self._expires_at = float(data["expires_at"])
+        elif data.get("expires_in"):
+            self._expires_at = time.time() + float(data["expires_in"])
+        else:
+            self._expires_at = _jwt_exp(self._access_token)
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """Seconds until the access token should be refreshed, None if unknown."""
+        if self._expires_at is None or not self._refresh_token:
+            return None
+        return max(0.0, self._expires_at - TOKEN_REFRESH_MARGIN - time.time())
+
+    async def ensure_fresh_token(self, within: float = 0) -> None:
+        """Refresh ahead of expiry so function calls rarely see a 401.
+
+        `within` also refreshes tokens due in that many seconds (coalesced refreshes).
+        """
+        remaining = self.seconds_until_refresh()
+        if remaining is not None and remaining <= within:
+            await self._refresh_shared(self._access_token)
 
     def export_tokens(self) -> Dict[str, Optional[str]]:
         return {"access_token": self._access_token, "refresh_token": self._refresh_token}
@@ -55,10 +188,13 @@ class VorratskammerAPI:
     async def login_password(self, email: str, password: str) -> Dict[str, str]:
         url = f"{self._gotrue}/token?grant_type=password"
         payload = {"email": email, "password": password}
-        async with self._session.post(url, json=payload, headers=self._auth_headers(), raise_for_status=True) as resp:
+        async with self._session.post(
+            url, json=payload, headers=self._auth_headers(), raise_for_status=True, timeout=self._timeout
+        ) as resp:
             data = await resp.json()
         self._access_token = data.get("access_token")
         self._refresh_token = data.get("refresh_token")
+        self._update_expiry(data)
         if not self._access_token:
             raise RuntimeError(f"Supabase login returned no access_token: {data}")
         return {"access_token": self._access_token, "refresh_token": self._refresh_token}
@@ -68,7 +204,7 @@ class VorratskammerAPI:
             raise RuntimeError("No refresh_token available.")
         url = f"{self._gotrue}/token?grant_type=refresh_token"
         payload = {"refresh_token": self._refresh_token}
-        async with self._session.post(url, json=payload, headers=self._auth_headers()) as resp:
+        async with self._session.post(url, json=payload, headers=self._auth_headers(), timeout=self._timeout) as resp:
             text_body = None
             try:
                 text_body = await resp.text()
@@ -84,49 +220,273 @@ class VorratskammerAPI:
                 raise RuntimeError(f"Invalid JSON during refresh: {text_body}") from err
         self._access_token = data.get("access_token")
         self._refresh_token = data.get("refresh_token", self._refresh_token)
+        self._update_expiry(data)
         if not self._access_token:
             raise RuntimeError(f"Failed to refresh access token: {data}")
         if hasattr(self, "_on_refresh"):
             await self._on_refresh()  # type: ignore
         return self._access_token
 
-    async def _call(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def _refresh_shared(self, stale_token: Optional[str]) -> None:
+        """Refresh once for every caller that saw a 401 with the same access token.
+
+        Callers arriving while a refresh runs await that one and share its error;
+        a refresh token GoTrue already rejected is not sent again.
+        """
+        task = self._refresh_task
+        if task is None:
+            if self._access_token != stale_token:
+                # Another caller already refreshed
+                return
+            if self._refresh_token is not None and self._refresh_token == self._rejected_refresh_token:
+                raise RefreshTokenInvalid("Supabase already rejected this refresh_token")
+            task = asyncio.get_running_loop().create_task(self._refresh_counted())
+            self._refresh_task = task
+            task.add_done_callback(self._refresh_done)
+        # Shielded so one cancelled caller does not cancel the refresh for the others
+        await asyncio.shield(task)
+
+    async def _refresh_counted(self) -> None:
+        try:
+            await self.refresh()
+        except RefreshTokenInvalid:
+            self._rejected_refresh_token = self._refresh_token
+            self.metrics.token_refresh_failures += 1
+            raise
+        except Exception:
+            self.metrics.token_refresh_failures += 1
+            raise
+        self.metrics.token_refreshes += 1
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        if self._refresh_task is task:
+            self._refresh_task = None
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every caller was cancelled
+
+    @staticmethod
+    async def _safe_text(resp: aiohttp.ClientResponse) -> Optional[str]:
+        try:
+            return await resp.text()
+        except Exception:  # pragma: no cover
+            return None
+
+    @staticmethod
+    def _key(path: str, params: Optional[Dict[str, Any]]) -> _CallKey:
+        return (path, tuple(sorted((params or {}).items())))
+
+    def invalidate_cache(self) -> None:
+        """Drop TTL-cached responses, e.g. after a mutation or a realtime change."""
+        self._ttl_cache.clear()
+
+    async def _get(
+        self,
+        path: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        conditional: bool = True,
+    ) -> Any:
+        key = self._key(path, params)
+        cached = self._responses.get(key) if conditional else None
+        headers = self._function_headers()
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        stats = self.metrics.endpoint(path)
+        async with self._semaphore:
+            with stats.request():
+                async with self._session.get(url, headers=headers, params=params, timeout=self._timeout) as resp:
+                    if resp.status == 401:
+                        body = await self._safe_text(resp)
+                        _LOGGER.warning("401 from %s (body=%s) — attempting token refresh", path, body)
+                        self.metrics.unauthorized += 1
+                        return _UNAUTHORIZED
+                    if resp.status == 304 and cached is not None:
+                        stats.not_modified += 1
+                        return cached.data
+                    if resp.status in _RETRY_STATUSES:
+                        txt = await self._safe_text(resp)
+                        raise TransientError(
+                            f"HTTP {resp.status} calling {path}: {txt}",
+                            resp.status,
+                            parse_retry_after(resp.headers.get(aiohttp.hdrs.RETRY_AFTER)),
+                        )
+                    if resp.status >= 400:
+                        txt = await self._safe_text(resp)
+                        _LOGGER.error("HTTP %s calling %s params=%s body=%s", resp.status, path, params, txt)
+                    resp.raise_for_status()
+                    body = await resp.read()
+                    etag = resp.headers.get(aiohttp.hdrs.ETAG)
+        stats.record_body(len(body))
+
+        # Backends without ETag support: skip decoding when the body is byte-identical
+        digest = _digest(body)
+        if cached is not None and cached.digest == digest:
+            cached.etag = etag or cached.etag
+            stats.not_modified += 1
+            return cached.data
+        previous = cached.content if cached is not None else None
+        if len(body) > JSON_EXECUTOR_THRESHOLD:
+            # Large inventories: keep decoding off the event loop
+            content, data = await asyncio.get_running_loop().run_in_executor(None, _decode, body, previous)
+        else:
+            content, data = _decode(body, previous)
+        if data is None and cached is not None:
+            # Only the response timestamps changed: keep the previous object
+            cached.etag, cached.digest = etag or cached.etag, digest
+            stats.not_modified += 1
+            return cached.data
+        stats.items_last = count_items(data)
+        if conditional:
+            self._responses[key] = _CachedResponse(etag, digest, content, data)
+        return data
+
+    async def _post(self, path: str, payload: Dict[str, Any], idempotency_key: str) -> Any:
         url = f"{self._functions}/{path.lstrip('/')}"
-        async with self._lock:
-            async with self._session.get(url, headers=self._function_headers(), params=params) as resp:
-                if resp.status == 401:
-                    body = None
-                    try:
-                        body = await resp.text()
-                    except Exception:  # pragma: no cover
-                        pass
-                    _LOGGER.warning("401 from %s (body=%s) — attempting token refresh", path, body)
-                    if not self._refresh_token:
-                        raise RuntimeError("Unauthorized and no refresh token available; re-auth required.")
-                    try:
-                        await self.refresh()
-                    except Exception as refresh_err:  # pragma: no cover
-                        raise RuntimeError(f"Token refresh failed: {refresh_err}") from refresh_err
-                    # Retry once after refresh
-                    async with self._session.get(url, headers=self._function_headers(), params=params) as r2:
-                        if r2.status == 401:
-                            body2 = None
-                            try:
-                                body2 = await r2.text()
-                            except Exception:
-                                pass
-                            raise RuntimeError(f"Unauthorized after refresh when calling {path}: {body2}")
-                        r2.raise_for_status()
-                        return await r2.json()
-                if resp.status >= 400:
-                    txt = None
-                    try:
-                        txt = await resp.text()
-                    except Exception:  # pragma: no cover
-                        pass
-                    _LOGGER.error("HTTP %s calling %s params=%s body=%s", resp.status, path, params, txt)
-                resp.raise_for_status()
-                return await resp.json()
+        headers = self._function_headers()
+        # Same key on every retry, so the backend can drop a duplicate of a mutation it already applied
+        headers["Idempotency-Key"] = idempotency_key
+        async with self._semaphore:
+            with self.metrics.endpoint(path).request():
+                async with self._session.post(url, headers=headers, json=payload, timeout=self._timeout) as resp:
+                    if resp.status == 401:
+                        _LOGGER.warning("401 from %s — attempting token refresh", path)
+                        self.metrics.unauthorized += 1
+                        return _UNAUTHORIZED
+                    if resp.status in _RETRY_STATUSES:
+                        txt = await self._safe_text(resp)
+                        raise TransientError(
+                            f"HTTP {resp.status} calling {path}: {txt}",
+                            resp.status,
+                            parse_retry_after(resp.headers.get(aiohttp.hdrs.RETRY_AFTER)),
+                        )
+                    if resp.status >= 400:
+                        txt = await self._safe_text(resp)
+                        _LOGGER.error("HTTP %s calling %s body=%s", resp.status, path, txt)
+                    resp.raise_for_status()
+                    body = await resp.read()
+        return _json_loads(body) if body else {}
+
+    async def _call(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        conditional: bool = True,
+    ) -> Dict[str, Any]:
+        """GET a function; `conditional=False` skips the per-(path, params) response cache."""
+        key = self._key(path, params)
+        if self._ttl > 0 and (hit := self._ttl_cache.get(key)) is not None:
+            if hit[0] > time.monotonic():
+                self._ttl_cache.move_to_end(key)
+                return hit[1]
+            del self._ttl_cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._call_uncached(path, params, conditional))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._call_done(key, t))
+        # Shielded so one cancelled caller does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def cancel_pending(self) -> None:
+        """Cancel in-flight calls, including ones waiting to retry (entry unload)."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+
+    def _call_done(self, key: _CallKey, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self._ttl > 0:
+            self._ttl_cache[key] = (time.monotonic() + self._ttl, task.result())
+            self._ttl_cache.move_to_end(key)
+            while len(self._ttl_cache) > self._ttl_size:
+                self._ttl_cache.popitem(last=False)
+
+    def set_request_timeout(self, seconds: float) -> None:
+        self._timeout = aiohttp.ClientTimeout(total=seconds)
+
+    def breaker_states(self) -> Dict[str, str]:
+        """Circuit state per Edge Function called so far."""
+        return {path: breaker.state for path, breaker in self._breakers.items()}
+
+    async def _call_uncached(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        conditional: bool = True,
+    ) -> Dict[str, Any]:
+        url = f"{self._functions}/{path.lstrip('/')}"
+        return await self._resilient(path, lambda: self._get(path, url, params, conditional))
+
+    async def _resilient(self, path: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `send` with token handling, retries and the endpoint's circuit breaker."""
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = self._breakers[path] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT)
+        try:
+            probe = breaker.check()  # raises CircuitOpenError during an outage, without a request
+        except CircuitOpenError:
+            self.metrics.circuit_rejections += 1
+            raise
+
+        attempt = 0
+        try:
+            while True:
+                try:
+                    data = await self._authorized(path, send)
+                except _TRANSIENT_ERRORS as err:
+                    retry_after = getattr(err, "retry_after", None)
+                    if attempt >= self._retries or (retry_after or 0) > RETRY_AFTER_MAX:
+                        breaker.record_failure()
+                        raise
+                    delay = retry_after if retry_after is not None else backoff_delay(
+                        attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+                    )
+                    attempt += 1
+                    self.metrics.retries += 1
+                    self.metrics.endpoint(path).retries += 1
+                    _LOGGER.debug("Transient error calling %s (%r); retry %s in %.1fs", path, err, attempt, delay)
+                    await asyncio.sleep(delay)
+                except Exception:
+                    # The backend answered, so it is up; the error belongs to this call only
+                    breaker.record_success()
+                    raise
+                else:
+                    breaker.record_success()
+                    return data
+        except asyncio.CancelledError:
+            # Otherwise a cancelled probe would keep the endpoint blocked for good
+            if probe:
+                breaker.release_probe()
+            raise
+
+    async def _authorized(self, path: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            await self.ensure_fresh_token()
+        except Exception as err:
+            # Not fatal: the token may still be accepted, and the 401 path below retries
+            _LOGGER.debug("Proactive token refresh failed: %s", err)
+        token = self._access_token
+        data = await send()
+        if data is not _UNAUTHORIZED:
+            return data
+
+        if not self._refresh_token:
+            raise RuntimeError("Unauthorized and no refresh token available; re-auth required.")
+        try:
+            await self._refresh_shared(token)
+        except Exception as refresh_err:  # pragma: no cover
+            raise RuntimeError(f"Token refresh failed: {refresh_err}") from refresh_err
+
+        # Retry once after refresh
+        data = await send()
+        if data is _UNAUTHORIZED:
+            raise RuntimeError(f"Unauthorized after refresh when calling {path}")
+        return data
 
     async def inventory_summary(self) -> Dict[str, Any]:
         return await self._call("ha-inventory-summary")
@@ -141,3 +501,25 @@ class VorratskammerAPI:
     async def location_items(self, location_id: Optional[str] = None) -> Dict[str, Any]:
         params = {"location_id": location_id} if location_id else None
         return await self._call("ha-location-items", params=params)
+
+    async def location_items_changes(self, updated_since: str) -> Dict[str, Any]:
+        """Items changed since a sync cursor (see delta.py for the response shape).
+
+        Not conditional: every cursor is a new key, so cached responses would only pile up.
+        """
+        return await self._call(
+            "ha-location-items",
+            params={"updated_since": updated_since},
+            conditional=False,
+        )
+
+    async def bulk_items(self, action: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply one mutation (`consume`, `add` or `move`) to many items in a single request."""
+        path = "ha-items-bulk"
+        payload = {"action": action, "items": items}
+        key = uuid.uuid4().hex
+        try:
+            return await self._resilient(path, lambda: self._post(path, payload, key))
+        finally:
+            # Cached reads may predate the mutation
+            self.invalidate_cache()
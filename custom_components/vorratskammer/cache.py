@@ -0,0 +1,43 @@
+"""Last good coordinator payloads persisted with HA's Store helper."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY
+from .coordinator import VorratskammerCoordinator
+
+STORAGE_VERSION = 1
+
+
+class SnapshotCache:
+    """Per-entry on-disk snapshot so sensors come up instantly after a restart."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[Dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+        self._data: Dict[str, Any] = {}
+
+    async def async_load(self) -> Dict[str, Any]:
+        """Cached payloads keyed by coordinator key."""
+        self._data = await self._store.async_load() or {}
+        return {key: value["data"] for key, value in self._data.items() if isinstance(value, dict)}
+
+    @callback
+    def async_track(self, key: str, coordinator: VorratskammerCoordinator) -> Callable[[], None]:
+        """Persist (debounced, in the background) every fresh payload of `coordinator`."""
+
+        @callback
+        def _on_update() -> None:
+            if coordinator.stale or coordinator.data is None:
+                return
+            self._data[key] = {"saved_at": dt_util.utcnow().isoformat(), "data": coordinator.data}
+            self._store.async_delay_save(lambda: self._data, SNAPSHOT_SAVE_DELAY)
+
+        _on_update()  # data from a first refresh that ran before tracking started
+        return coordinator.async_add_listener(_on_update)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
@@ -5,7 +5,7 @@ from typing import Any, Dict
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import aiohttp_client
 
@@ -18,12 +18,24 @@ from .const import (
     CONF_PASSWORD,
     CONF_DAYS_AHEAD,
     CONF_SCAN_SUMMARY,
-    CONF_SCAN_EXPIRING,
     CONF_SCAN_LOCATIONS,
+    CONF_SNAPSHOT_MODE,
+    CONF_DELTA_SYNC,
+    CONF_ITEM_ENTITIES,
+    CONF_REALTIME,
+    CONF_REALTIME_TABLES,
+    CONF_ADAPTIVE_POLLING,
+    CONF_REQUEST_TIMEOUT,
     DEFAULT_DAYS_AHEAD,
     DEFAULT_SCAN_SUMMARY,
-    DEFAULT_SCAN_EXPIRING,
     DEFAULT_SCAN_LOCATIONS,
+    DEFAULT_SNAPSHOT_MODE,
+    DEFAULT_DELTA_SYNC,
+    DEFAULT_ITEM_ENTITIES,
+    DEFAULT_REALTIME,
+    DEFAULT_REALTIME_TABLES,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_REQUEST_TIMEOUT,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -36,14 +48,27 @@ STEP_USER_SCHEMA = vol.Schema(
         vol.Required(CONF_PASSWORD): str,
         vol.Optional(CONF_DAYS_AHEAD, default=DEFAULT_DAYS_AHEAD): vol.All(int, vol.Range(min=1, max=60)),
         vol.Optional(CONF_SCAN_SUMMARY, default=DEFAULT_SCAN_SUMMARY): vol.All(int, vol.Range(min=60, max=3600)),
-        vol.Optional(CONF_SCAN_EXPIRING, default=DEFAULT_SCAN_EXPIRING): vol.All(int, vol.Range(min=60, max=3600)),
         vol.Optional(CONF_SCAN_LOCATIONS, default=DEFAULT_SCAN_LOCATIONS): vol.All(int, vol.Range(min=60, max=3600)),
+        vol.Optional(CONF_SNAPSHOT_MODE, default=DEFAULT_SNAPSHOT_MODE): bool,
+        vol.Optional(CONF_DELTA_SYNC, default=DEFAULT_DELTA_SYNC): bool,
+        vol.Optional(CONF_ITEM_ENTITIES, default=DEFAULT_ITEM_ENTITIES): bool,
+        vol.Optional(CONF_REALTIME, default=DEFAULT_REALTIME): bool,
+        vol.Optional(CONF_REALTIME_TABLES, default=DEFAULT_REALTIME_TABLES): str,
+        vol.Optional(CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING): bool,
+        vol.Optional(CONF_REQUEST_TIMEOUT, default=DEFAULT_REQUEST_TIMEOUT): vol.All(int, vol.Range(min=5, max=120)),
     }
 )
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    _reauth_entry: config_entries.ConfigEntry | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input: Dict[str, Any] | None = None) -> FlowResult:
         if user_input is None:
             return self.async_show_form(step_id="user", data_schema=STEP_USER_SCHEMA)
@@ -70,42 +95,42 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             "access_token": tokens.get("access_token"),
             "refresh_token": tokens.get("refresh_token"),
             CONF_SCAN_SUMMARY: user_input[CONF_SCAN_SUMMARY],
-            CONF_SCAN_EXPIRING: user_input[CONF_SCAN_EXPIRING],
             CONF_SCAN_LOCATIONS: user_input[CONF_SCAN_LOCATIONS],
         }
         options = {
             CONF_DAYS_AHEAD: user_input[CONF_DAYS_AHEAD],
+            CONF_SNAPSHOT_MODE: user_input[CONF_SNAPSHOT_MODE],
+            CONF_DELTA_SYNC: user_input[CONF_DELTA_SYNC],
+            CONF_ITEM_ENTITIES: user_input[CONF_ITEM_ENTITIES],
+            CONF_REALTIME: user_input[CONF_REALTIME],
+            CONF_REALTIME_TABLES: user_input[CONF_REALTIME_TABLES],
+            CONF_ADAPTIVE_POLLING: user_input[CONF_ADAPTIVE_POLLING],
+            CONF_REQUEST_TIMEOUT: user_input[CONF_REQUEST_TIMEOUT],
         }
 
         return self.async_create_entry(title="Vorratskammer", data=data, options=options)
 
-    async def async_step_reauth(self, entry_data: dict) -> FlowResult:
+    async def async_step_reauth(self, entry_data: Dict[str, Any]) -> FlowResult:
         """Handle re-auth (prompt for password again if refresh fails)."""
-        # Ask only for password; email/url are known.
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        if self._reauth_entry is None:
+            return self.async_abort(reason="unknown")
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input: Dict[str, Any] | None = None) -> FlowResult:
+        # Ask only for password; url, anon key and email are known.
         schema = vol.Schema({vol.Required(CONF_PASSWORD): str})
-        if (user_input := self._async_current_step_user_input()) is None:
-            pass  # noqa
-
-        if self.context.get("reauth_entry"):
-            entry = self.hass.config_entries.async_get_entry(self.context["reauth_entry"])
-            if entry is None:
-                return self.async_abort(reason="unknown")
-            if self.hass.data.get(DOMAIN) and self.hass.data[DOMAIN].get(entry.entry_id):
-                supabase_url = entry.data[CONF_SUPABASE_URL]
-                email = entry.data[CONF_EMAIL]
-            else:
-                supabase_url = entry.data[CONF_SUPABASE_URL]
-                email = entry.data[CONF_EMAIL]
-
-        if not user_input:
-            return self.async_show_form(step_id="reauth", data_schema=schema)
+        if user_input is None:
+            return self.async_show_form(step_id="reauth_confirm", data_schema=schema)
 
+        entry = self._reauth_entry
         session = aiohttp_client.async_get_clientsession(self.hass)
-        api = VorratskammerAPI(session, supabase_url)
+        api = VorratskammerAPI(session, entry.data[CONF_SUPABASE_URL], entry.data[CONF_ANON_KEY])
         try:
-            tokens = await api.login_password(email, user_input[CONF_PASSWORD])
-        except Exception:
-            return self.async_show_form(step_id="reauth", data_schema=schema, errors={"base": "auth"})
+            tokens = await api.login_password(entry.data[CONF_EMAIL], user_input[CONF_PASSWORD])
+        except Exception as err:
+            _LOGGER.warning("Re-authentication failed: %s", err)
+            return self.async_show_form(step_id="reauth_confirm", data_schema=schema, errors={"base": "auth"})
 
         # Save new tokens
         self.hass.config_entries.async_update_entry(
@@ -126,10 +151,22 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     vol.All(int, vol.Range(min=1, max=60)),
                 vol.Optional(CONF_SCAN_SUMMARY, default=self._entry.data.get(CONF_SCAN_SUMMARY)):
                     vol.All(int, vol.Range(min=60, max=3600)),
-                vol.Optional(CONF_SCAN_EXPIRING, default=self._entry.data.get(CONF_SCAN_EXPIRING)):
-                    vol.All(int, vol.Range(min=60, max=3600)),
                 vol.Optional(CONF_SCAN_LOCATIONS, default=self._entry.data.get(CONF_SCAN_LOCATIONS)):
                     vol.All(int, vol.Range(min=60, max=3600)),
+                vol.Optional(CONF_SNAPSHOT_MODE, default=self._entry.options.get(CONF_SNAPSHOT_MODE, DEFAULT_SNAPSHOT_MODE)):
+                    bool,
+                vol.Optional(CONF_DELTA_SYNC, default=self._entry.options.get(CONF_DELTA_SYNC, DEFAULT_DELTA_SYNC)):
+                    bool,
+                vol.Optional(CONF_ITEM_ENTITIES, default=self._entry.options.get(CONF_ITEM_ENTITIES, DEFAULT_ITEM_ENTITIES)):
+                    bool,
+                vol.Optional(CONF_REALTIME, default=self._entry.options.get(CONF_REALTIME, DEFAULT_REALTIME)):
+                    bool,
+                vol.Optional(CONF_REALTIME_TABLES, default=self._entry.options.get(CONF_REALTIME_TABLES, DEFAULT_REALTIME_TABLES)):
+                    str,
+                vol.Optional(CONF_ADAPTIVE_POLLING, default=self._entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)):
+                    bool,
+                vol.Optional(CONF_REQUEST_TIMEOUT, default=self._entry.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)):
+                    vol.All(int, vol.Range(min=5, max=120)),
             }
         )
         if user_input is None:
@@ -138,9 +175,26 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         data = {
             **self._entry.data,
             CONF_SCAN_SUMMARY: user_input[CONF_SCAN_SUMMARY],
-            CONF_SCAN_EXPIRING: user_input[CONF_SCAN_EXPIRING],
             CONF_SCAN_LOCATIONS: user_input[CONF_SCAN_LOCATIONS],
         }
-        self.hass.config_entries.async_update_entry(self._entry, data=data, options={CONF_DAYS_AHEAD: user_input[CONF_DAYS_AHEAD]})
-        await self.hass.config_entries.async_reload(self._entry.entry_id)
+        options = {
+            CONF_DAYS_AHEAD: user_input[CONF_DAYS_AHEAD],
+            CONF_SNAPSHOT_MODE: user_input[CONF_SNAPSHOT_MODE],
+            CONF_DELTA_SYNC: user_input[CONF_DELTA_SYNC],
+            CONF_ITEM_ENTITIES: user_input[CONF_ITEM_ENTITIES],
+            CONF_REALTIME: user_input[CONF_REALTIME],
+            CONF_REALTIME_TABLES: user_input[CONF_REALTIME_TABLES],
+            CONF_ADAPTIVE_POLLING: user_input[CONF_ADAPTIVE_POLLING],
+            CONF_REQUEST_TIMEOUT: user_input[CONF_REQUEST_TIMEOUT],
+        }
+        # Scan intervals, days_ahead and the request timeout are applied in place by the
+        # entry's update listener; only options that change which coordinators/entities exist reload
+        needs_reload = any(
+            options[key] != self._entry.options.get(key)
+            for key in options
+            if key not in (CONF_DAYS_AHEAD, CONF_REQUEST_TIMEOUT)
+        )
+        self.hass.config_entries.async_update_entry(self._entry, data=data, options=options)
+        if needs_reload:
+            await self.hass.config_entries.async_reload(self._entry.entry_id)
         return self.async_abort(reason="options_updated")
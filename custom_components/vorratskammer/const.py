@@ -8,12 +8,49 @@ CONF_PASSWORD = "password"
 
 CONF_DAYS_AHEAD = "days_ahead"            # for ha-expiring-items
 CONF_SCAN_SUMMARY = "scan_summary"
-CONF_SCAN_EXPIRING = "scan_expiring"
+CONF_SCAN_EXPIRING = "scan_expiring"    # legacy: expiring items are derived from location items
 CONF_SCAN_LOCATIONS = "scan_locations"
+CONF_SNAPSHOT_MODE = "snapshot_mode"      # fetch location items once, derive the other sensors
+CONF_DELTA_SYNC = "delta_sync"            # poll location items with updated_since
+CONF_ITEM_ENTITIES = "item_entities"      # one sensor per item (in addition to per location)
+CONF_REALTIME = "realtime"                # Supabase Realtime push instead of fast polling
+CONF_REALTIME_TABLES = "realtime_tables"  # comma-separated tables to subscribe to
+CONF_ADAPTIVE_POLLING = "adaptive_polling"  # scale scan intervals with change rate/errors
+CONF_REQUEST_TIMEOUT = "request_timeout"  # seconds per Edge Function request
 
 DEFAULT_DAYS_AHEAD = 7
 DEFAULT_SCAN_SUMMARY = 300
-DEFAULT_SCAN_EXPIRING = 600
 DEFAULT_SCAN_LOCATIONS = 300
+DEFAULT_SNAPSHOT_MODE = False
+DEFAULT_DELTA_SYNC = False
+DEFAULT_ITEM_ENTITIES = False
+DEFAULT_REALTIME = False
+DEFAULT_REALTIME_TABLES = "items,locations"
+REALTIME_SAFETY_INTERVAL = 3600  # poll interval while the realtime socket is healthy
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_REQUEST_TIMEOUT = 20
+ADAPTIVE_MIN_INTERVAL = 60  # fastest poll after a change (seconds)
+ADAPTIVE_MAX_FACTOR = 8     # slowest poll = scan interval * factor when idle or failing
+DELTA_RESYNC_INTERVAL = 3600  # seconds between full location-items fetches in delta mode
+
+STARTUP_DEFER_JITTER = 30  # max seconds after HA start before the heavy pollers first load
+SNAPSHOT_SAVE_DELAY = 30  # seconds to debounce writes of the on-disk snapshot cache
 
 STORAGE_TOKENS = "tokens"  # key in hass.data[DOMAIN][entry_id]
+
+DEFAULT_MAX_CONCURRENCY = 4  # parallel Edge Function requests per Supabase project
+RESPONSE_CACHE_TTL = 10      # seconds identical function calls are answered from memory
+RESPONSE_CACHE_SIZE = 32     # max cached (endpoint, params) responses
+REFRESH_COALESCE_WINDOW = 300  # tokens due within this many seconds refresh together
+DATA_CONNECTIONS = "connections"  # key in hass.data[DOMAIN] for ConnectionManager instances
+TOKEN_REFRESH_MARGIN = 120  # seconds before JWT expiry to refresh proactively
+JSON_EXECUTOR_THRESHOLD = 256 * 1024  # bytes; larger bodies are decoded in the executor
+VOLATILE_FIELDS = ("timestamp", "last_updated")  # per-response fields ignored when comparing payloads
+RETRY_ATTEMPTS = 2           # extra attempts on 5xx/429/connection errors/timeouts
+RETRY_BACKOFF_BASE = 1.0     # seconds; full-jitter exponential backoff between attempts
+RETRY_BACKOFF_MAX = 10       # cap for the computed backoff
+RETRY_AFTER_MAX = 30         # longer Retry-After values fail the call instead of waiting
+CIRCUIT_FAILURE_THRESHOLD = 3  # failed calls (after retries) before an endpoint's circuit opens
+CIRCUIT_RECOVERY_TIMEOUT = 60  # seconds before an open circuit lets a probe request through
+MAX_SUMMARY_ITEMS = 100  # cap for all_items_sorted on the aggregate location items sensor
+MAX_LOCATION_ITEMS = 25  # cap for the items attribute of each per-location sensor
@@ -1,14 +1,57 @@
 from __future__ import annotations
 
 import logging
+from contextlib import nullcontext
 from datetime import timedelta
-from typing import Any, Callable, Dict
+from typing import Any, Callable, ContextManager, Dict, Optional
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .metrics import Metrics
+from .snapshot import without_volatile
+
 _LOGGER = logging.getLogger(__name__)
 
+
+def _timed(metrics: Optional[Metrics], name: str) -> ContextManager[None]:
+    return metrics.timed(metrics.updates, name) if metrics is not None else nullcontext()
+
+
+class AdaptiveInterval:
+    """Poll interval that follows change rate, errors and the expiry horizon.
+
+    Changes drop the interval to `min_s`; identical payloads and errors double it
+    up to `max_s`. While an item is about to expire it never backs off past base.
+    """
+
+    def __init__(self, base_s: float, min_s: float, max_s: float) -> None:
+        self.base_s = base_s
+        self.min_s = min_s
+        self.max_s = max_s
+        self.current_s = base_s
+        self._configured_min_s = min_s
+
+    def next(self, *, changed: bool = False, failed: bool = False, urgent: bool = False) -> timedelta:
+        if failed:
+            current = max(self.current_s, self.base_s) * 2
+        elif changed:
+            current = self.min_s
+        else:
+            current = self.current_s * 2
+        if urgent and not failed:
+            current = min(current, self.base_s)
+        self.current_s = max(self.min_s, min(max(self.max_s, self.base_s), current))
+        return timedelta(seconds=self.current_s)
+
+    def rebase(self, base_s: float, min_s: Optional[float] = None) -> None:
+        """New base interval; `min_s` raises the floor (None restores the configured one)."""
+        self.base_s = base_s
+        self.min_s = min(self._configured_min_s, base_s) if min_s is None else min_s
+        self.current_s = base_s
+
+
 class VorratskammerCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
     def __init__(
         self,
@@ -16,20 +59,146 @@ class VorratskammerCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         name: str,
         update_interval_s: int,
         fetcher: Callable[[], Any],
+        adaptive: Optional[AdaptiveInterval] = None,
+        urgent: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        metrics: Optional[Metrics] = None,
     ) -> None:
         super().__init__(
             hass,
             _LOGGER,
             name=name,
             update_interval=timedelta(seconds=update_interval_s),
+            # The API returns the previous object for unchanged payloads; skip the state write
+            always_update=False,
         )
         self._fetcher = fetcher
+        self._adaptive = adaptive
+        self._urgent = urgent
+        self._metrics = metrics
+        self._restored = False
+        self._held_interval: Optional[timedelta] = None  # set while scheduled polls wait for their offset
+
+    @callback
+    def async_delay_polling(self, offset_s: float) -> Callable[[], None]:
+        """Arm scheduled polls only after `offset_s` (staggers entries of one project).
+
+        Refreshes in between (startup loads, requested refreshes) still run; the first
+        scheduled poll comes one interval after the offset. Returns a cancel callback.
+        """
+        if offset_s <= 0 or self.update_interval is None:
+            return lambda: None
+        self._held_interval = self.update_interval
+        self.update_interval = None
+        self._async_unsub_refresh()
+
+        @callback
+        def _resume(_now: Any) -> None:
+            interval, self._held_interval = self._held_interval, None
+            self.update_interval = interval
+            if self._listeners:
+                self._schedule_refresh()
+
+        return async_call_later(self.hass, offset_s, _resume)
+
+    def _set_interval(self, interval: timedelta) -> None:
+        if self._held_interval is not None:
+            self._held_interval = interval
+        else:
+            self.update_interval = interval
+
+    @property
+    def stale(self) -> bool:
+        """Data was restored from disk or the last refresh failed."""
+        return self._restored or not self.last_update_success
+
+    @callback
+    def async_restore(self, data: Dict[str, Any]) -> None:
+        """Seed with a cached payload; marked stale until the next successful refresh."""
+        self.data = data
+        self._restored = True
+
+    def set_base_interval(self, update_interval_s: float, min_interval_s: Optional[float] = None) -> None:
+        """Change the configured interval (the adaptive policy scales around it, never below `min_interval_s`)."""
+        if self._adaptive is not None:
+            self._adaptive.rebase(update_interval_s, min_interval_s)
+        self._set_interval(timedelta(seconds=update_interval_s))
 
     async def _async_update_data(self) -> Dict[str, Any]:
         try:
-            data = await self._fetcher()
+            with _timed(self._metrics, self.name):
+                data = await self._fetcher()
             if not isinstance(data, dict):
                 raise UpdateFailed("Unexpected response type (expected JSON object).")
-            return data
         except Exception as err:
+            if self._adaptive is not None:
+                self._set_interval(self._adaptive.next(failed=True))
             raise UpdateFailed(str(err)) from err
+        restored, self._restored = self._restored, False
+        # always_update=False only notifies on changed data, but clearing `stale` after a
+        # restore must reach the entities even when the fresh payload equals the snapshot
+        self.always_update = restored
+        if self._adaptive is not None and self.data is not None and not restored:
+            self._set_interval(
+                self._adaptive.next(
+                    # Content, not identity: a new object with only new timestamps is no change
+                    changed=data is not self.data and without_volatile(data) != without_volatile(self.data),
+                    urgent=bool(self._urgent and self._urgent(data)),
+                )
+            )
+        return data
+
+
+class SnapshotViewCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
+    """Derived view over another coordinator's data; never polls the backend."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        source: DataUpdateCoordinator[Dict[str, Any]],
+        derive: Callable[[Dict[str, Any]], Dict[str, Any]],
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        super().__init__(hass, _LOGGER, name=name)
+        self._source = source
+        self._derive_fn = derive
+        self._metrics = metrics
+        self._unsub_source: Callable[[], None] | None = None
+
+    def async_start(self) -> Callable[[], None]:
+        """Follow the source coordinator; returns the unsubscribe callback."""
+        self._unsub_source = self._source.async_add_listener(self._handle_source_update)
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub_source is not None:
+            self._unsub_source()
+            self._unsub_source = None
+
+    @property
+    def stale(self) -> bool:
+        return getattr(self._source, "stale", not self._source.last_update_success)
+
+    @callback
+    def async_rederive(self) -> None:
+        """Recompute from the current source data (day rollover, changed settings)."""
+        if self._source.last_update_success and self._source.data is not None:
+            self.async_set_updated_data(self._derive(self._source.data))
+
+    @callback
+    def _handle_source_update(self) -> None:
+        if self._source.last_update_success:
+            self.async_set_updated_data(self._derive(self._source.data or {}))
+        else:
+            self.last_update_success = False
+            self.async_update_listeners()
+
+    def _derive(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        with _timed(self._metrics, self.name):
+            return self._derive_fn(data)
+
+    async def _async_update_data(self) -> Dict[str, Any]:
+        if not self._source.last_update_success or self._source.data is None:
+            raise UpdateFailed("Snapshot source has no data.")
+        return self._derive(self._source.data)
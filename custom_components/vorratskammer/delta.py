@@ -0,0 +1,151 @@
+"""Local item index for incremental (delta) sync of ha-location-items.
+
+The index is seeded from a full `ha-location-items` payload and then patched
+with delta responses for `updated_since=<cursor>`:
+
+    {"delta": true, "cursor": "...", "items": [{"id": ..., "location_id": ...}],
+     "deleted": ["<item id>", ...], "locations": [...], "deleted_locations": [...]}
+
+A response without `"delta": true` is treated as a full payload, so backends
+that ignore `updated_since` keep working; backends that reject it with an
+HTTP error get full fetches from then on.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from .snapshot import iter_locations, location_id, location_items
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LocationItemsIndex:
+    """Items keyed by id, grouped by location, rebuilt into the full payload shape."""
+
+    def __init__(self) -> None:
+        self.cursor: Optional[str] = None
+        self.synced_at: Optional[float] = None  # monotonic time of last full sync
+        self.disabled = False  # backend rejected updated_since; never try deltas again
+        self._template: Dict[str, Any] = {}
+        self._locations: Dict[Any, Dict[str, Any]] = {}  # location id -> location without items
+        self._items: Dict[Any, Dict[str, Any]] = {}  # item id -> item
+        self._item_location: Dict[Any, Any] = {}  # item id -> location id
+        self._payload: Optional[Dict[str, Any]] = None
+
+    @property
+    def supported(self) -> bool:
+        return not self.disabled and self.synced_at is not None
+
+    def load_full(self, data: Dict[str, Any]) -> None:
+        """Reset from a full payload; delta sync stays off if items carry no ids."""
+        self._template = {k: v for k, v in data.items() if k != "locations"}
+        self._locations = {}
+        self._items = {}
+        self._item_location = {}
+        self._payload = data
+        self.cursor = data.get("cursor") or data.get("timestamp") or data.get("last_updated")
+        self.synced_at = None
+        for loc in iter_locations(data):
+            loc_id = location_id(loc)
+            if loc_id is None:
+                return
+            self._locations[loc_id] = loc
+            for item in location_items(loc):
+                item_id = item.get("id")
+                if item_id is None:
+                    return
+                self._items[item_id] = item
+                self._item_location[item_id] = loc_id
+        if self.cursor is not None:
+            self.synced_at = time.monotonic()
+
+    def apply_delta(self, delta: Dict[str, Any]) -> bool:
+        """Merge inserts, updates and deletes; returns True if anything changed."""
+        changed = False
+        for loc in delta.get("locations") or []:
+            loc_id = location_id(loc)
+            if loc_id is not None:
+                self._locations[loc_id] = loc
+                changed = True
+        for loc_id in delta.get("deleted_locations") or []:
+            if self._locations.pop(loc_id, None) is not None:
+                for item_id in [i for i, l in self._item_location.items() if l == loc_id]:
+                    del self._items[item_id]
+                    del self._item_location[item_id]
+                changed = True
+        for item_id in delta.get("deleted") or []:
+            if self._items.pop(item_id, None) is not None:
+                self._item_location.pop(item_id, None)
+                changed = True
+        for item in delta.get("items") or []:
+            item_id = item.get("id")
+            loc_id = item.get("location_id", self._item_location.get(item_id))
+            if item_id is None or loc_id not in self._locations:
+                continue
+            self._items[item_id] = item
+            self._item_location[item_id] = loc_id
+            changed = True
+        self.cursor = delta.get("cursor") or self.cursor
+        if changed:
+            self._payload = None
+        return changed
+
+    def as_payload(self) -> Dict[str, Any]:
+        """Full ha-location-items shaped payload (cached until the next change)."""
+        if self._payload is not None:
+            return self._payload
+        grouped: Dict[Any, List[Dict[str, Any]]] = {loc_id: [] for loc_id in self._locations}
+        for item_id, item in self._items.items():
+            grouped[self._item_location[item_id]].append(item)
+        locations = []
+        for loc_id, loc in self._locations.items():
+            items = grouped[loc_id]
+            out = dict(loc, total_items=len(items))
+            if "attributes" in loc:
+                out["attributes"] = dict(loc.get("attributes") or {}, items=items)
+            else:
+                out["items"] = items
+            locations.append(out)
+        payload = dict(self._template, locations=locations, total_locations=len(locations))
+        self._payload = payload
+        return payload
+
+
+def delta_fetcher(
+    full: Callable[[], Awaitable[Dict[str, Any]]],
+    changes: Callable[[str], Awaitable[Dict[str, Any]]],
+    resync_interval_s: int,
+) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    """Coordinator fetcher: delta polls, with a periodic full resync as fallback."""
+    index = LocationItemsIndex()
+
+    async def _fetch() -> Dict[str, Any]:
+        if (
+            not index.supported
+            or index.cursor is None
+            or time.monotonic() - (index.synced_at or 0) >= resync_interval_s
+        ):
+            data = await full()
+            index.load_full(data)
+            return data
+        try:
+            data = await changes(index.cursor)
+        except aiohttp.ClientResponseError as err:
+            # A non-transient HTTP error (e.g. 400 on updated_since) would fail every poll
+            # until the next resync; transient errors and open circuits still propagate
+            _LOGGER.info("Delta sync not supported by the backend (%s); using full fetches", err)
+            index.disabled = True
+            data = await full()
+            index.load_full(data)
+            return data
+        if not data.get("delta"):
+            index.load_full(data)
+            return data
+        index.apply_delta(data)
+        return index.as_payload()
+
+    return _fetch
@@ -0,0 +1,38 @@
+"""Diagnostics for the Vorratskammer integration (tokens and credentials redacted)."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ANON_KEY, CONF_EMAIL, CONF_PASSWORD, DOMAIN
+from .metrics import count_items
+
+TO_REDACT = {CONF_ANON_KEY, CONF_EMAIL, CONF_PASSWORD, "access_token", "refresh_token"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    store = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    api = store.get("api")
+    metrics = store.get("metrics")
+    coordinators = {
+        key: {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval_s": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "stale": getattr(coordinator, "stale", False),
+            "items": count_items(coordinator.data),
+        }
+        for key, coordinator in store.get("coordinators", {}).items()
+    }
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "token_refresh_in_s": api.seconds_until_refresh() if api else None,
+        "circuits": api.breaker_states() if api else {},
+        "coordinators": coordinators,
+        "metrics": metrics.as_dict() if metrics else None,
+    }
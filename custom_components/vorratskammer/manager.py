@@ -0,0 +1,131 @@
+"""Per-Supabase-project resources shared by all config entries of that project."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import aiohttp_client
+from homeassistant.helpers.event import async_call_later
+
+from .api import RefreshTokenInvalid, VorratskammerAPI
+from .const import (
+    DOMAIN,
+    DATA_CONNECTIONS,
+    DEFAULT_MAX_CONCURRENCY,
+    REFRESH_COALESCE_WINDOW,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_GOLDEN_RATIO = 0.6180339887  # spreads any number of slots evenly over an interval
+
+
+class ConnectionManager:
+    """Shared session, request budget and token refresh timer.
+
+    Each entry keeps its own account tokens; the manager only decides when
+    they are refreshed, so refreshes that fall close together run in one wakeup.
+    """
+
+    def __init__(self, hass: HomeAssistant, supabase_url: str) -> None:
+        self._hass = hass
+        self.supabase_url = supabase_url
+        # Own session on HA's keep-alive connector pool, detached when the last entry
+        # of the project unloads (not tied to whichever entry happened to create it);
+        # the semaphore caps concurrent requests per project across all entries
+        self.session = aiohttp_client.async_create_clientsession(hass, auto_cleanup=False)
+        self.semaphore = asyncio.Semaphore(DEFAULT_MAX_CONCURRENCY)
+        self._apis: Dict[str, VorratskammerAPI] = {}
+        self._slots: Dict[str, int] = {}
+        self._cancel_refresh: Optional[Callable[[], None]] = None
+
+    # ---------- Entries ----------
+    def _slot(self, entry_id: str) -> int:
+        if entry_id not in self._slots:
+            used = set(self._slots.values())
+            self._slots[entry_id] = next(i for i in range(len(used) + 1) if i not in used)
+        return self._slots[entry_id]
+
+    def poll_offset(self, entry_id: str, interval_s: float) -> float:
+        """Delay for an entry's first poll so entries do not fire in lockstep."""
+        return (self._slot(entry_id) * _GOLDEN_RATIO % 1.0) * interval_s
+
+    @callback
+    def async_register(self, entry_id: str, api: VorratskammerAPI) -> None:
+        self._slot(entry_id)
+        self._apis[entry_id] = api
+        self.async_schedule_refresh()
+
+    @callback
+    def async_unregister(self, entry_id: str) -> None:
+        self._apis.pop(entry_id, None)
+        self._slots.pop(entry_id, None)
+        self.async_schedule_refresh()
+
+    @property
+    def in_use(self) -> bool:
+        # Slots, not APIs: an entry waiting for re-authentication still uses the session
+        return bool(self._slots)
+
+    # ---------- Token refresh ----------
+    @callback
+    def async_schedule_refresh(self) -> None:
+        """(Re)arm one timer for the earliest token refresh of all entries."""
+        if self._cancel_refresh is not None:
+            self._cancel_refresh()
+            self._cancel_refresh = None
+        delays = [d for api in self._apis.values() if (d := api.seconds_until_refresh()) is not None]
+        if not delays:
+            return
+        # Floor the delay so a failing refresh does not spin
+        self._cancel_refresh = async_call_later(self._hass, max(min(delays), 30), self._async_refresh_due)
+
+    async def _async_refresh_due(self, _now: Any) -> None:
+        self._cancel_refresh = None
+        # Everything due within the window is refreshed now, in parallel
+        apis = list(self._apis.items())
+        results = await asyncio.gather(
+            *(api.ensure_fresh_token(within=REFRESH_COALESCE_WINDOW) for _, api in apis),
+            return_exceptions=True,
+        )
+        for (entry_id, api), result in zip(apis, results):
+            if isinstance(result, RefreshTokenInvalid):
+                # Retrying cannot help; stop refreshing this entry and ask the user to log in again
+                _LOGGER.warning("Refresh token rejected, starting re-authentication: %s", result)
+                if self._apis.get(entry_id) is api:
+                    del self._apis[entry_id]
+                if (entry := self._hass.config_entries.async_get_entry(entry_id)) is not None:
+                    entry.async_start_reauth(self._hass)
+            elif isinstance(result, Exception):
+                _LOGGER.warning("Background token refresh failed: %s", result)
+        self.async_schedule_refresh()
+
+    async def async_close(self) -> None:
+        if self._cancel_refresh is not None:
+            self._cancel_refresh()
+            self._cancel_refresh = None
+        # HA's shared connector stays open; detaching is how its sessions are released
+        self.session.detach()
+
+
+@callback
+def async_get_manager(hass: HomeAssistant, supabase_url: str) -> ConnectionManager:
+    managers: Dict[str, ConnectionManager] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CONNECTIONS, {})
+    key = supabase_url.rstrip("/")
+    if key not in managers:
+        managers[key] = ConnectionManager(hass, key)
+    return managers[key]
+
+
+async def async_release_manager(hass: HomeAssistant, supabase_url: str, entry_id: str) -> None:
+    managers: Dict[str, ConnectionManager] = hass.data.get(DOMAIN, {}).get(DATA_CONNECTIONS, {})
+    key = supabase_url.rstrip("/")
+    manager = managers.get(key)
+    if manager is None:
+        return
+    manager.async_unregister(entry_id)
+    if not manager.in_use:
+        managers.pop(key)
+        await manager.async_close()
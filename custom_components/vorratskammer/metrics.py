@@ -0,0 +1,154 @@
+"""In-memory counters and latency histograms for the API and coordinators."""
+from __future__ import annotations
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .snapshot import iter_locations, location_items
+
+# Upper bucket bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def count_items(data: Any) -> Optional[int]:
+    """Items in a function payload (location lists or an `items` attribute), None if unknown."""
+    if not isinstance(data, dict):
+        return None
+    locations = iter_locations(data)
+    if locations:
+        return sum(len(location_items(loc)) for loc in locations)
+    items = (data.get("attributes") or {}).get("items", data.get("items"))
+    return len(items) if isinstance(items, list) else None
+
+
+class Histogram:
+    """Fixed-bucket histogram of millisecond durations."""
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS_MS) -> None:
+        self._bounds = bounds
+        self._counts: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms: Optional[float] = None
+
+    def observe(self, ms: float) -> None:
+        self._counts[bisect.bisect_left(self._bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, capped at the observed max."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            if seen >= rank:
+                return _round(min(float(bound), self.max_ms))
+        return _round(self.max_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(self._bounds, self._counts)}
+        buckets["inf"] = self._counts[-1]
+        return {
+            "count": self.count,
+            "last_ms": _round(self.last_ms),
+            "mean_ms": _round(self.total_ms / self.count) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": _round(self.max_ms),
+            "buckets": buckets,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+class EndpointStats:
+    """Per Edge Function: request latency, response sizes and outcome counts."""
+
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.errors = 0
+        self.retries = 0
+        self.not_modified = 0  # 304 or body unchanged apart from timestamps
+        self.bytes_total = 0
+        self.bytes_last: Optional[int] = None
+        self.items_last: Optional[int] = None
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.latency.observe((time.monotonic() - started) * 1000)
+
+    def record_body(self, size: int) -> None:
+        self.bytes_total += size
+        self.bytes_last = size
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.as_dict(),
+            "errors": self.errors,
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "bytes_last": self.bytes_last,
+            "bytes_total": self.bytes_total,
+            "items_last": self.items_last,
+        }
+
+
+class Metrics:
+    """Instrumentation for one config entry; read by diagnostic sensors and diagnostics."""
+
+    def __init__(self) -> None:
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.token_refreshes = 0
+        self.token_refresh_failures = 0
+        self.unauthorized = 0
+        self.retries = 0
+        self.circuit_rejections = 0
+        self.updates: Dict[str, Histogram] = {}  # coordinator name -> update duration
+        self.attribute_builds: Dict[str, Histogram] = {}  # sensor key -> build duration
+        self.startup: Dict[str, float] = {}  # setup phase -> ms since async_setup_entry began
+
+    def endpoint(self, path: str) -> EndpointStats:
+        stats = self.endpoints.get(path)
+        if stats is None:
+            stats = self.endpoints[path] = EndpointStats()
+        return stats
+
+    @contextmanager
+    def timed(self, table: Dict[str, Histogram], key: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            if key not in table:
+                table[key] = Histogram()
+            table[key].observe((time.monotonic() - started) * 1000)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {path: stats.as_dict() for path, stats in self.endpoints.items()},
+            "token_refreshes": self.token_refreshes,
+            "token_refresh_failures": self.token_refresh_failures,
+            "unauthorized": self.unauthorized,
+            "retries": self.retries,
+            "circuit_rejections": self.circuit_rejections,
+            "coordinator_updates": {name: h.as_dict() for name, h in self.updates.items()},
+            "attribute_builds": {key: h.as_dict() for key, h in self.attribute_builds.items()},
+            "startup": dict(self.startup),
+        }
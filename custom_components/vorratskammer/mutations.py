@@ -0,0 +1,128 @@
+"""Optimistic local patches of the ha-location-items payload for the bulk services.
+
+Patches are copy-on-write: touched locations and items are new objects, the rest
+are shared, so identity-based caches (sensor attributes, detail index) stay valid
+for unchanged parts and the coordinator sees a changed payload.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from .snapshot import iter_locations, location_id, location_items
+
+
+def _with_items(loc: Dict[str, Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(loc.get("attributes"), dict) and "items" in loc["attributes"]:
+        return {**loc, "attributes": {**loc["attributes"], "items": items}}
+    if "items" in loc:
+        return {**loc, "items": items}
+    return {**loc, "attributes": {**(loc.get("attributes") or {}), "items": items}}
+
+
+def _with_locations(data: Dict[str, Any], locations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if "locations" in data:
+        return {**data, "locations": locations}
+    return {**data, "attributes": {**(data.get("attributes") or {}), "locations": locations}}
+
+
+class _Patch:
+    """Mutable working copy of the location item lists."""
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self._data = data
+        self._locations = list(iter_locations(data))
+        self._items: Dict[int, List[Dict[str, Any]]] = {}  # index -> copied item list
+        self._where: Dict[str, int] = {}  # str(item id) -> location index
+        self._by_location: Dict[str, int] = {}  # str(location id) -> location index
+        for index, loc in enumerate(self._locations):
+            if (loc_id := location_id(loc)) is not None:
+                self._by_location[str(loc_id)] = index
+            for item in location_items(loc):
+                if item.get("id") is not None:
+                    self._where[str(item["id"])] = index
+
+    def _list(self, index: int) -> List[Dict[str, Any]]:
+        if index not in self._items:
+            self._items[index] = list(location_items(self._locations[index]))
+        return self._items[index]
+
+    def find(self, item_id: Any) -> Optional[tuple[int, int]]:
+        index = self._where.get(str(item_id))
+        if index is None:
+            return None
+        for pos, item in enumerate(self._list(index)):
+            if str(item.get("id")) == str(item_id):
+                return index, pos
+        return None
+
+    def get(self, at: tuple[int, int]) -> Dict[str, Any]:
+        return self._list(at[0])[at[1]]
+
+    def replace(self, at: tuple[int, int], item: Dict[str, Any]) -> None:
+        self._list(at[0])[at[1]] = item
+
+    def remove(self, at: tuple[int, int]) -> Dict[str, Any]:
+        item = self._list(at[0]).pop(at[1])
+        self._where.pop(str(item.get("id")), None)
+        return item
+
+    def has_location(self, loc_id: Any) -> bool:
+        return str(loc_id) in self._by_location
+
+    def append(self, loc_id: Any, item: Dict[str, Any]) -> None:
+        index = self._by_location[str(loc_id)]
+        self._list(index).append(item)
+        if item.get("id") is not None:
+            self._where[str(item["id"])] = index
+
+    def result(self) -> Dict[str, Any]:
+        if not self._items:
+            return self._data
+        locations = [
+            _with_items(loc, self._items[index]) if index in self._items else loc
+            for index, loc in enumerate(self._locations)
+        ]
+        return _with_locations(self._data, locations)
+
+
+def apply_consume(data: Dict[str, Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce quantities; items that reach zero are removed."""
+    patch = _Patch(data)
+    for request in items:
+        at = patch.find(request["id"])
+        if at is None:
+            continue
+        item = patch.get(at)
+        remaining = (item.get("quantity") or 0) - request.get("quantity", 1)
+        if remaining > 0:
+            patch.replace(at, {**item, "quantity": remaining})
+        else:
+            patch.remove(at)
+    return patch.result()
+
+
+def apply_add(data: Dict[str, Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add items to their `location_id`; items for unknown locations wait for the next poll."""
+    patch = _Patch(data)
+    for item in items:
+        at = patch.find(item["id"]) if item.get("id") is not None else None
+        if at is not None:
+            existing = patch.get(at)
+            patch.replace(at, {**existing, "quantity": (existing.get("quantity") or 0) + item.get("quantity", 1)})
+        elif patch.has_location(item.get("location_id")):
+            patch.append(item["location_id"], dict(item))
+    return patch.result()
+
+
+def apply_move(data: Dict[str, Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Move items to another location."""
+    patch = _Patch(data)
+    for request in items:
+        if not patch.has_location(request["location_id"]):
+            continue
+        at = patch.find(request["id"])
+        if at is None:
+            continue
+        item = patch.remove(at)
+        patch.append(request["location_id"], {**item, "location_id": request["location_id"]})
+    return patch.result()
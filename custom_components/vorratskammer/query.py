@@ -0,0 +1,145 @@
+"""In-memory indexes over the location_items payload for the query service."""
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .snapshot import iter_items, location_id, location_name, location_type, parse_date
+
+SORT_KEYS = ("expires", "name", "quantity", "location")
+
+
+def normalize(text: Any) -> str:
+    """Casefolded, accent-free, whitespace-collapsed text ("Käse " -> "kase")."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+class InventoryIndex:
+    """Items indexed by name/product tokens, location, category and expiry.
+
+    Rebuilt only when the payload object changes, like ExpiryIndex.
+    """
+
+    def __init__(self) -> None:
+        self._source: Optional[Dict[str, Any]] = None
+        self._clear()
+
+    def _clear(self) -> None:
+        self._records: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []  # (location, item)
+        self._tokens: Dict[str, Set[int]] = {}
+        self._locations: Dict[str, Set[int]] = {}  # normalized name and id -> records
+        self._location_types: Dict[str, Set[int]] = {}
+        self._categories: Dict[str, Set[int]] = {}
+        self._expiry: List[Tuple[date, int]] = []
+        self._expiry_dates: List[date] = []
+
+    def update(self, data: Dict[str, Any]) -> None:
+        if data is self._source:
+            return
+        self._clear()
+        self._source = data
+        for index, (loc, item) in enumerate(iter_items(data)):
+            self._records.append((loc, item))
+            for field in ("name", "product"):
+                for token in normalize(item.get(field)).split():
+                    self._tokens.setdefault(token, set()).add(index)
+            for key in (location_name(loc), location_id(loc)):
+                if key is not None:
+                    self._locations.setdefault(normalize(key), set()).add(index)
+            if (loc_type := location_type(loc)) is not None:
+                self._location_types.setdefault(normalize(loc_type), set()).add(index)
+            if (category := item.get("category")) is not None:
+                self._categories.setdefault(normalize(category), set()).add(index)
+            if (expires_on := parse_date(item.get("expires"))) is not None:
+                self._expiry.append((expires_on, index))
+        self._expiry.sort()
+        self._expiry_dates = [e[0] for e in self._expiry]
+
+    def _match_text(self, text: str) -> Set[int]:
+        """Records whose name/product has, for every query word, a word starting with it."""
+        result: Optional[Set[int]] = None
+        for word in normalize(text).split():
+            hits: Set[int] = set()
+            for token, indices in self._tokens.items():
+                if token.startswith(word):
+                    hits |= indices
+            result = hits if result is None else result & hits
+            if not result:
+                return set()
+        return result or set()
+
+    def _expiring(self, after: Optional[date], before: Optional[date]) -> Set[int]:
+        lo = bisect_left(self._expiry_dates, after) if after is not None else 0
+        hi = bisect_right(self._expiry_dates, before) if before is not None else len(self._expiry)
+        return {index for _, index in self._expiry[lo:hi]}
+
+    def query(
+        self,
+        today: date,
+        *,
+        name: Optional[str] = None,
+        location: Optional[str] = None,
+        location_type_: Optional[str] = None,
+        category: Optional[str] = None,
+        expires_after: Optional[date] = None,
+        expires_before: Optional[date] = None,
+        min_quantity: Optional[float] = None,
+        sort: str = "expires",
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        candidates: List[Set[int]] = []
+        if name:
+            candidates.append(self._match_text(name))
+        if location:
+            candidates.append(self._locations.get(normalize(location), set()))
+        if location_type_:
+            candidates.append(self._location_types.get(normalize(location_type_), set()))
+        if category:
+            candidates.append(self._categories.get(normalize(category), set()))
+        if expires_after is not None or expires_before is not None:
+            candidates.append(self._expiring(expires_after, expires_before))
+
+        indices: Iterable[int]
+        if candidates:
+            candidates.sort(key=len)
+            indices = set.intersection(*candidates)
+        else:
+            indices = range(len(self._records))
+        if min_quantity is not None:
+            indices = [i for i in indices if (self._records[i][1].get("quantity") or 0) >= min_quantity]
+
+        matches = sorted(indices, key=lambda i: self._sort_key(i, sort), reverse=descending)
+        total_quantity = sum(self._records[i][1].get("quantity") or 0 for i in matches)
+        shown = matches[:limit] if limit is not None else matches
+        return {
+            "count": len(matches),
+            "total_quantity": total_quantity,
+            "truncated": len(shown) < len(matches),
+            "items": [self._result(i, today) for i in shown],
+        }
+
+    def _sort_key(self, index: int, sort: str) -> Tuple:
+        loc, item = self._records[index]
+        if sort == "name":
+            return (normalize(item.get("name") or item.get("product")),)
+        if sort == "quantity":
+            return (item.get("quantity") or 0,)
+        if sort == "location":
+            return (normalize(location_name(loc)), item.get("expires") or "9999-12-31")
+        # Undated items last
+        return (item.get("expires") or "9999-12-31",)
+
+    def _result(self, index: int, today: date) -> Dict[str, Any]:
+        loc, item = self._records[index]
+        expires_on = parse_date(item.get("expires"))
+        return {
+            **item,
+            "location": location_name(loc),
+            "location_type": location_type(loc),
+            "days_until_expiry": (expires_on - today).days if expires_on is not None else None,
+        }
@@ -0,0 +1,139 @@
+"""Supabase Realtime (Phoenix channel) subscription used to trigger refreshes."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 25  # seconds; Supabase drops sockets without a heartbeat after ~60s
+RECONNECT_MIN = 5
+RECONNECT_MAX = 300
+TOPIC = "realtime:vorratskammer"
+
+
+class RealtimeClient:
+    """Websocket subscription to postgres_changes on the inventory tables."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        supabase_url: str,
+        anon_key: str,
+        tables: Iterable[str],
+        get_token: Callable[[], Optional[str]],
+        on_change: Callable[[Optional[str]], None],
+        on_health: Callable[[bool], None],
+    ) -> None:
+        base = supabase_url.rstrip("/").replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        self._url = f"{base}/realtime/v1/websocket"
+        self._anon_key = anon_key
+        self._tables = [t.strip() for t in tables if t.strip()]
+        self._session = session
+        self._get_token = get_token
+        self._on_change = on_change
+        self._on_health = on_health
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ref = 0
+        self.healthy = False
+
+    def start(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        if self._task is None:
+            self._task = entry.async_create_background_task(hass, self._run(), "Vorratskammer realtime")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # No health callback on shutdown; the coordinators are going away too
+        self.healthy = False
+
+    async def update_token(self, token: Optional[str]) -> None:
+        """Hand a refreshed access token to the open channel."""
+        if self._ws is not None and not self._ws.closed and token:
+            await self._send("access_token", {"access_token": token})
+
+    def _set_healthy(self, healthy: bool) -> None:
+        if healthy != self.healthy:
+            self.healthy = healthy
+            self._on_health(healthy)
+
+    async def _send(self, event: str, payload: Dict[str, Any], topic: str = TOPIC) -> None:
+        self._ref += 1
+        assert self._ws is not None
+        await self._ws.send_json({"topic": topic, "event": event, "payload": payload, "ref": str(self._ref)})
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await self._send("heartbeat", {}, topic="phoenix")
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                await self._connect()
+                delay = RECONNECT_MIN
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.debug("Realtime connection failed: %s", err)
+            self._set_healthy(False)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _connect(self) -> None:
+        params = {"apikey": self._anon_key, "vsn": "1.0.0"}
+        async with self._session.ws_connect(self._url, params=params) as ws:
+            self._ws = ws
+            heartbeat = asyncio.get_running_loop().create_task(self._heartbeat())
+            try:
+                await self._send(
+                    "phx_join",
+                    {
+                        "config": {
+                            "postgres_changes": [
+                                {"event": "*", "schema": "public", "table": table} for table in self._tables
+                            ]
+                        },
+                        "access_token": self._get_token(),
+                    },
+                )
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    self._handle(msg.json())
+            finally:
+                heartbeat.cancel()
+                # Also retrieves a send error from the heartbeat on a closing socket
+                await asyncio.gather(heartbeat, return_exceptions=True)
+                self._ws = None
+
+    def _handle(self, msg: Dict[str, Any]) -> None:
+        if msg.get("topic") != TOPIC:
+            return
+        event = msg.get("event")
+        payload = msg.get("payload") or {}
+        if event == "phx_reply":
+            if payload.get("status") == "ok":
+                self._set_healthy(True)
+            else:
+                _LOGGER.warning("Realtime subscription rejected: %s", payload.get("response"))
+                self._set_healthy(False)
+        elif event == "postgres_changes":
+            self._on_change((payload.get("data") or {}).get("table"))
+        elif event in ("phx_error", "phx_close"):
+            _LOGGER.debug("Realtime channel %s: %s", event, payload)
+            self._set_healthy(False)
@@ -1,19 +1,47 @@
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import RestoreSensor, SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_ITEM_ENTITIES,
+    DEFAULT_ITEM_ENTITIES,
+    MAX_LOCATION_ITEMS,
+    MAX_SUMMARY_ITEMS,
+)
+from .api import VorratskammerAPI
 from .coordinator import VorratskammerCoordinator
+from .metrics import Histogram, Metrics
+from .snapshot import (
+    consumed_quantity,
+    item_quantities,
+    iter_items,
+    iter_locations,
+    location_id,
+    location_items,
+    location_name,
+    location_type,
+)
 
 PARALLEL_UPDATES = 0
 
+# Edge Function polled by each backend coordinator (for the latency sensors)
+POLLER_ENDPOINTS = {
+    "summary": "ha-inventory-summary",
+    "locations": "ha-location-status",
+    "location_items": "ha-location-items",
+}
+
 
 @dataclass
 class SensorDescription:
@@ -28,6 +56,7 @@ async def async_setup_entry(
 ):
     store = hass.data[DOMAIN][entry.entry_id]
     coords: dict[str, VorratskammerCoordinator] = store["coordinators"]
+    metrics: Metrics = store["metrics"]
 
     entities: list[SensorEntity] = [
         VorratskammerGenericSensor(
@@ -40,14 +69,63 @@ async def async_setup_entry(
             coords["locations"], entry.entry_id, "locations", "Pantry Locations", "locations", "mdi:home-group"
         ),
         VorratskammerGenericSensor(
-            coords["location_items"], entry.entry_id, "location_items", "Pantry Location Items", "locations", "mdi:clipboard-list"
+            coords["location_items"], entry.entry_id, "location_items", "Pantry Location Items", "locations", "mdi:clipboard-list",
+            metrics,
         ),
     ]
+    entities.append(VorratskammerConsumptionSensor(coords["location_items"], entry.entry_id))
+    entities += [
+        VorratskammerLatencySensor(metrics, entry.entry_id, path)
+        for key, path in POLLER_ENDPOINTS.items()
+        if key in store["pollers"]
+    ]
+    entities += [
+        VorratskammerRefreshSensor(metrics, store["api"], entry.entry_id),
+        VorratskammerUpdateDurationSensor(metrics, entry.entry_id),
+    ]
     async_add_entities(entities)
 
+    # Detail entities follow the locations (and optionally items) in the payload
+    coord_items = coords["location_items"]
+    index = _DetailIndex(coord_items)
+    item_entities = bool(entry.options.get(CONF_ITEM_ENTITIES, DEFAULT_ITEM_ENTITIES))
+    details: dict[str, SensorEntity] = {}
+
+    @callback
+    def _sync_detail_entities() -> None:
+        if not coord_items.last_update_success:
+            return
+        index.refresh()
+        wanted: dict[str, SensorEntity] = {}
+        for loc_key in index.locations:
+            key = f"location_{loc_key}"
+            wanted[key] = details.get(key) or VorratskammerLocationSensor(index, entry.entry_id, loc_key)
+        if item_entities:
+            for item_id in index.items:
+                key = f"item_{item_id}"
+                wanted[key] = details.get(key) or VorratskammerItemSensor(index, entry.entry_id, item_id)
+
+        new = [entity for key, entity in wanted.items() if key not in details]
+        registry = er.async_get(hass)
+        for key in [key for key in details if key not in wanted]:
+            entity = details.pop(key)
+            if entity.entity_id and registry.async_get(entity.entity_id):
+                registry.async_remove(entity.entity_id)
+            else:
+                hass.async_create_task(entity.async_remove(force_remove=True))
+        details.update({key: wanted[key] for key in wanted if key not in details})
+        if new:
+            async_add_entities(new)
+
+    _sync_detail_entities()
+    entry.async_on_unload(coord_items.async_add_listener(_sync_detail_entities))
+
 
 class VorratskammerGenericSensor(CoordinatorEntity[VorratskammerCoordinator], SensorEntity):
     _attr_should_poll = False
+    # Counts feed long-term statistics; the item lists stay out of the recorder
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _unrecorded_attributes = frozenset({"all_items_sorted", "locations", "items"})
 
     def __init__(
         self,
@@ -57,45 +135,322 @@ class VorratskammerGenericSensor(CoordinatorEntity[VorratskammerCoordinator], Se
         name: str,
         unit: str,
         icon: str,
+        metrics: Optional[Metrics] = None,
     ) -> None:
         super().__init__(coordinator)
+        self._metrics = metrics
         self._attr_unique_id = f"{entry_id}_{key}"
         self._attr_name = name
         self._attr_icon = icon
         self._attr_native_unit_of_measurement = unit
+        self._attrs_source: Optional[Dict[str, Any]] = None
+        self._attrs_cache: Dict[str, Any] = {}
+
+    @property
+    def available(self) -> bool:
+        # Keep showing the last known (possibly restored) data during an outage
+        return self.coordinator.data is not None
 
     @property
     def native_value(self) -> Optional[int]:
         data = self.coordinator.data or {}
         # Special handling for location_items sensor
         if self._attr_unique_id.endswith("location_items"):
-            # Use total_locations as state if present, else fallback to 0
-            return data.get("total_locations", 0)
+            # Use total_locations as state if present, else count the locations
+            total = data.get("total_locations", (data.get("attributes") or {}).get("total_locations"))
+            return total if total is not None else len(iter_locations(data))
         return data.get("state")
 
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
+        attrs = self._payload_attributes()
+        if self.coordinator.stale:
+            return {**attrs, "stale": True}
+        return attrs
+
+    def _payload_attributes(self) -> Dict[str, Any]:
         data = self.coordinator.data or {}
         # Special handling for location_items sensor
         if self._attr_unique_id.endswith("location_items"):
-            # Flatten all items, sorted by location and then by expires
-            locations = data.get("locations", [])
-            all_items = []
-            for loc in locations:
-                loc_name = loc.get("location_name") or loc.get("name")
-                items = loc.get("attributes", {}).get("items", [])
-                for item in items:
-                    item_copy = dict(item)
-                    item_copy["location"] = loc_name
-                    item_copy["location_type"] = loc.get("location_type")
-                    all_items.append(item_copy)
-            # Sort by location, then by expires (nulls last)
-            def expires_key(x):
-                return (x["location"], x["expires"] or "9999-12-31")
-            all_items_sorted = sorted(all_items, key=expires_key)
-            # Expose both the original locations and the sorted flat list
-            attrs = dict(data)
-            attrs["all_items_sorted"] = all_items_sorted
-            return attrs
+            # Built once per coordinator update, not on every attribute read
+            if self._attrs_source is not data:
+                if self._metrics is not None:
+                    with self._metrics.timed(self._metrics.attribute_builds, "location_items"):
+                        self._attrs_cache = self._build_location_items_attrs(data)
+                else:
+                    self._attrs_cache = self._build_location_items_attrs(data)
+                self._attrs_source = data
+            return self._attrs_cache
         attrs = data.get("attributes") or {}
         return attrs
+
+    def _build_location_items_attrs(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Bounded summary: only the first MAX_SUMMARY_ITEMS items by location, then
+        # expires (nulls last), are copied; per-item detail lives on the per-location entities.
+        locations = []
+        for loc in iter_locations(data):
+            locations.append(
+                {"name": location_name(loc), "location_type": location_type(loc), "total_items": len(location_items(loc))}
+            )
+        all_items_count = sum(loc["total_items"] for loc in locations)
+        soonest = heapq.nsmallest(
+            MAX_SUMMARY_ITEMS,
+            iter_items(data),
+            key=lambda pair: (location_name(pair[0]) or "", pair[1].get("expires") or "9999-12-31"),
+        )
+        # Top-level keys, plus `attributes` when the locations are nested there
+        attrs = {k: v for k, v in data.items() if k not in ("locations", "attributes")}
+        attrs.update((k, v) for k, v in (data.get("attributes") or {}).items() if k != "locations")
+        attrs["locations"] = locations
+        attrs["all_items_sorted"] = [
+            {**item, "location": location_name(loc), "location_type": location_type(loc)} for loc, item in soonest
+        ]
+        attrs["all_items_count"] = all_items_count
+        attrs["all_items_truncated"] = all_items_count > MAX_SUMMARY_ITEMS
+        return attrs
+
+
+class _DetailIndex:
+    """Locations and items of the location_items payload, indexed once per update."""
+
+    def __init__(self, coordinator: VorratskammerCoordinator) -> None:
+        self.coordinator = coordinator
+        self.locations: dict[str, Dict[str, Any]] = {}
+        self.items: dict[str, tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._source: Optional[Dict[str, Any]] = None
+
+    def refresh(self) -> None:
+        data = self.coordinator.data or {}
+        if data is self._source:
+            return
+        self._source = data
+        self.locations = {}
+        self.items = {}
+        for loc in iter_locations(data):
+            loc_key = str(location_id(loc) or location_name(loc))
+            self.locations[loc_key] = loc
+            for item in location_items(loc):
+                if item.get("id") is not None:
+                    self.items[str(item["id"])] = (item, loc)
+
+
+class VorratskammerLocationSensor(CoordinatorEntity[VorratskammerCoordinator], SensorEntity):
+    _attr_should_poll = False
+    _attr_icon = "mdi:fridge-outline"
+    _attr_native_unit_of_measurement = "items"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _unrecorded_attributes = frozenset({"items"})
+
+    def __init__(self, index: _DetailIndex, entry_id: str, loc_key: str) -> None:
+        super().__init__(index.coordinator)
+        self._index = index
+        self._loc_key = loc_key
+        self._attr_unique_id = f"{entry_id}_location_{loc_key}"
+        self._attr_name = f"Pantry {location_name(index.locations[loc_key]) or loc_key}"
+        self._items_source: Optional[Dict[str, Any]] = None
+        self._items_cache: list[Dict[str, Any]] = []
+
+    def _location(self) -> Optional[Dict[str, Any]]:
+        self._index.refresh()
+        return self._index.locations.get(self._loc_key)
+
+    @property
+    def available(self) -> bool:
+        return super().available and self._location() is not None
+
+    @property
+    def native_value(self) -> Optional[int]:
+        loc = self._location()
+        return len(location_items(loc)) if loc is not None else None
+
+    def _soonest_items(self, loc: Dict[str, Any]) -> list[Dict[str, Any]]:
+        # Bounded, soonest-expiring first; the full list is in the query service and item entities
+        if loc is not self._items_source:
+            items = sorted(location_items(loc), key=lambda x: x.get("expires") or "9999-12-31")
+            self._items_cache = items[:MAX_LOCATION_ITEMS]
+            self._items_source = loc
+        return self._items_cache
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        loc = self._location() or {}
+        items = self._soonest_items(loc)
+        return {
+            "location_id": location_id(loc),
+            "location_type": location_type(loc),
+            "note": loc.get("note"),
+            "expiring_items": loc.get("expiring_items"),
+            "items": items,
+            "items_truncated": len(location_items(loc)) > len(items),
+        }
+
+
+class VorratskammerItemSensor(CoordinatorEntity[VorratskammerCoordinator], SensorEntity):
+    _attr_should_poll = False
+    _attr_icon = "mdi:food-variant"
+
+    def __init__(self, index: _DetailIndex, entry_id: str, item_id: str) -> None:
+        super().__init__(index.coordinator)
+        self._index = index
+        self._item_id = item_id
+        self._attr_unique_id = f"{entry_id}_item_{item_id}"
+        self._attr_name = f"Pantry Item {index.items[item_id][0].get('name') or item_id}"
+
+    def _entry(self) -> Optional[tuple[Dict[str, Any], Dict[str, Any]]]:
+        self._index.refresh()
+        return self._index.items.get(self._item_id)
+
+    @property
+    def available(self) -> bool:
+        return super().available and self._entry() is not None
+
+    @property
+    def native_value(self) -> Any:
+        entry = self._entry()
+        return entry[0].get("quantity") if entry is not None else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        item, loc = self._entry() or ({}, {})
+        return {
+            "brand": item.get("brand"),
+            "expires": item.get("expires"),
+            "days_until_expiry": item.get("days_until_expiry"),
+            "location": location_name(loc),
+            "location_type": location_type(loc),
+        }
+
+
+class VorratskammerConsumptionSensor(CoordinatorEntity[VorratskammerCoordinator], RestoreSensor):
+    """Running total of consumed quantity; statistics turn it into consumption per day."""
+
+    _attr_should_poll = False
+    _attr_icon = "mdi:silverware-fork-knife"
+    _attr_native_unit_of_measurement = "items"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator: VorratskammerCoordinator, entry_id: str) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry_id}_consumed"
+        self._attr_name = "Pantry Items Consumed"
+        self._total = 0.0
+        self._source: Optional[Dict[str, Any]] = None
+        self._quantities: Optional[dict[str, float]] = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if (last := await self.async_get_last_sensor_data()) is not None:
+            try:
+                self._total = float(last.native_value or 0)
+            except (TypeError, ValueError):
+                pass
+        self._track()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._track()
+        super()._handle_coordinator_update()
+
+    def _track(self) -> None:
+        data = self.coordinator.data
+        if data is None or data is self._source:
+            return
+        self._source = data
+        quantities = item_quantities(data)
+        if self._quantities is not None:
+            self._total += consumed_quantity(self._quantities, quantities)
+        self._quantities = quantities
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.data is not None
+
+    @property
+    def native_value(self) -> float:
+        return round(self._total, 3)
+
+
+class _VorratskammerDiagnosticSensor(SensorEntity):
+    """Reads the in-memory metrics; polled because metrics change without data updates."""
+
+    _attr_should_poll = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _unrecorded_attributes = frozenset({"latency", "coordinators", "attribute_builds", "circuits"})
+
+    def __init__(self, metrics: Metrics, entry_id: str, key: str, name: str) -> None:
+        self._metrics = metrics
+        self._attr_unique_id = f"{entry_id}_diag_{key}"
+        self._attr_name = name
+
+
+class VorratskammerLatencySensor(_VorratskammerDiagnosticSensor):
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, metrics: Metrics, entry_id: str, path: str) -> None:
+        super().__init__(metrics, entry_id, f"latency_{path}", f"Pantry API latency {path}")
+        self._path = path
+
+    @property
+    def native_value(self) -> Optional[float]:
+        stats = self._metrics.endpoints.get(self._path)
+        return round(stats.latency.last_ms, 1) if stats and stats.latency.last_ms is not None else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        stats = self._metrics.endpoints.get(self._path)
+        return stats.as_dict() if stats else {}
+
+
+class VorratskammerRefreshSensor(_VorratskammerDiagnosticSensor):
+    _attr_icon = "mdi:key-chain"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, metrics: Metrics, api: VorratskammerAPI, entry_id: str) -> None:
+        super().__init__(metrics, entry_id, "token_refreshes", "Pantry API token refreshes")
+        self._api = api
+
+    @property
+    def native_value(self) -> int:
+        return self._metrics.token_refreshes
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        m = self._metrics
+        return {
+            "refresh_failures": m.token_refresh_failures,
+            "unauthorized_responses": m.unauthorized,
+            "retries": m.retries,
+            "circuit_rejections": m.circuit_rejections,
+            "circuits": self._api.breaker_states(),
+        }
+
+
+class VorratskammerUpdateDurationSensor(_VorratskammerDiagnosticSensor):
+    _attr_icon = "mdi:timer-sand"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, metrics: Metrics, entry_id: str) -> None:
+        super().__init__(metrics, entry_id, "update_duration", "Pantry update duration")
+
+    @property
+    def native_value(self) -> Optional[float]:
+        # Slowest coordinator's last update
+        last = [h.last_ms for h in self._metrics.updates.values() if h.last_ms is not None]
+        return round(max(last), 1) if last else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return {
+            "coordinators": {name: _without_buckets(h) for name, h in self._metrics.updates.items()},
+            "attribute_builds": {key: _without_buckets(h) for key, h in self._metrics.attribute_builds.items()},
+        }
+
+
+def _without_buckets(histogram: Histogram) -> Dict[str, Any]:
+    return {k: v for k, v in histogram.as_dict().items() if k != "buckets"}
@@ -0,0 +1,171 @@
+"""Bulk inventory mutation services (one backend request per call) and the local query service."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .mutations import apply_add, apply_consume, apply_move
+from .query import SORT_KEYS, InventoryIndex
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_ITEMS = "items"
+
+SERVICE_CONSUME_ITEMS = "consume_items"
+SERVICE_ADD_ITEMS = "add_items"
+SERVICE_MOVE_ITEMS = "move_items"
+SERVICE_QUERY = "query"
+
+_ID = vol.Any(cv.positive_int, cv.string)
+_QUANTITY = vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False))
+
+CONSUME_ITEM = vol.Schema({vol.Required("id"): _ID, vol.Optional("quantity", default=1): _QUANTITY})
+ADD_ITEM = vol.Schema(
+    {
+        vol.Required("name"): cv.string,
+        vol.Required("location_id"): _ID,
+        vol.Optional("quantity", default=1): _QUANTITY,
+        vol.Optional("id"): _ID,
+        vol.Optional("product"): cv.string,
+        vol.Optional("category"): cv.string,
+        vol.Optional("unit"): cv.string,
+        vol.Optional("brand"): cv.string,
+        vol.Optional("expires"): cv.date,
+    }
+)
+MOVE_ITEM = vol.Schema({vol.Required("id"): _ID, vol.Required("location_id"): _ID})
+
+
+def _schema(item_schema: vol.Schema) -> vol.Schema:
+    return vol.Schema(
+        {
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Required(ATTR_ITEMS): vol.All(cv.ensure_list, vol.Length(min=1), [item_schema]),
+        }
+    )
+
+
+# service -> (backend action, request schema, optimistic patch)
+SERVICES: Dict[str, tuple[str, vol.Schema, Callable[[Dict[str, Any], List[Dict[str, Any]]], Dict[str, Any]]]] = {
+    SERVICE_CONSUME_ITEMS: ("consume", _schema(CONSUME_ITEM), apply_consume),
+    SERVICE_ADD_ITEMS: ("add", _schema(ADD_ITEM), apply_add),
+    SERVICE_MOVE_ITEMS: ("move", _schema(MOVE_ITEM), apply_move),
+}
+
+
+QUERY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional("name"): cv.string,
+        vol.Optional("location"): cv.string,
+        vol.Optional("location_type"): cv.string,
+        vol.Optional("category"): cv.string,
+        vol.Optional("expires_within_days"): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional("expires_after"): cv.date,
+        vol.Optional("expires_before"): cv.date,
+        vol.Optional("min_quantity"): vol.Coerce(float),
+        vol.Optional("sort", default="expires"): vol.In(SORT_KEYS),
+        vol.Optional("descending", default=False): cv.boolean,
+        vol.Optional("limit", default=50): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+    }
+)
+
+
+def _entry_store(hass: HomeAssistant, entry_id: str | None) -> Dict[str, Any]:
+    stores = {
+        key: store
+        for key, store in hass.data.get(DOMAIN, {}).items()
+        if isinstance(store, dict) and "api" in store and "coordinators" in store
+    }
+    if entry_id is not None:
+        if entry_id not in stores:
+            raise HomeAssistantError(f"Vorratskammer entry {entry_id} is not loaded")
+        return stores[entry_id]
+    if len(stores) != 1:
+        raise HomeAssistantError(f"{len(stores)} Vorratskammer entries loaded; pass config_entry_id")
+    return next(iter(stores.values()))
+
+
+def _serializable(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v.isoformat() if hasattr(v, "isoformat") else v for k, v in item.items()} for item in items]
+
+
+def _with_generated_ids(items: List[Dict[str, Any]], result: Any) -> List[Dict[str, Any]]:
+    """Add requests with the ids the backend generated for new items.
+
+    Echoed rows hold stored totals, not the requested deltas, so only their ids
+    are used; rows are matched by position when there is one per request item.
+    """
+    echoed = result.get("items") if isinstance(result, dict) else None
+    if not isinstance(echoed, list) or len(echoed) != len(items):
+        return items
+    return [
+        {**item, "id": row["id"]}
+        if item.get("id") is None and isinstance(row, dict) and row.get("id") is not None
+        else item
+        for item, row in zip(items, echoed)
+    ]
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def _handle(call: ServiceCall) -> ServiceResponse:
+        action, _, patch = SERVICES[call.service]
+        store = _entry_store(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        items = _serializable(call.data[ATTR_ITEMS])
+        try:
+            result = await store["api"].bulk_items(action, items)
+        except Exception as err:
+            raise HomeAssistantError(f"{call.service} failed: {err}") from err
+
+        # Patch with the requested deltas; echoed rows only contribute generated ids
+        applied = _with_generated_ids(items, result) if action == "add" else items
+        coordinator = store["coordinators"]["location_items"]
+        if coordinator.data is not None:
+            coordinator.async_set_updated_data(patch(coordinator.data, applied))
+        # Reconcile summary/locations (and anything the patch could not know) with the backend
+        for key, poller in store.get("pollers", {}).items():
+            if key != "location_items":
+                await poller.async_request_refresh()
+        return result if isinstance(result, dict) else {"result": result}
+
+    async def _query(call: ServiceCall) -> ServiceResponse:
+        store = _entry_store(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        data = store["coordinators"]["location_items"].data
+        if data is None:
+            raise HomeAssistantError("No inventory data loaded yet")
+        index: InventoryIndex = store.setdefault("inventory_index", InventoryIndex())
+        index.update(data)  # no-op unless the payload changed since the last query
+
+        today = dt_util.now().date()
+        expires_before = call.data.get("expires_before")
+        if (days := call.data.get("expires_within_days")) is not None:
+            within = date.fromordinal(today.toordinal() + days)
+            expires_before = min(expires_before, within) if expires_before else within
+        return index.query(
+            today,
+            name=call.data.get("name"),
+            location=call.data.get("location"),
+            location_type_=call.data.get("location_type"),
+            category=call.data.get("category"),
+            expires_after=call.data.get("expires_after"),
+            expires_before=expires_before,
+            min_quantity=call.data.get("min_quantity"),
+            sort=call.data["sort"],
+            descending=call.data["descending"],
+            limit=call.data["limit"],
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_QUERY, _query, schema=QUERY_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
+    for service, (_, schema, _) in SERVICES.items():
+        hass.services.async_register(
+            DOMAIN, service, _handle, schema=schema, supports_response=SupportsResponse.OPTIONAL
+        )
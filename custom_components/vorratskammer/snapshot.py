@@ -0,0 +1,235 @@
+"""Derive the summary, expiring and location views from a location_items payload.
+
+Used in snapshot mode, where only `ha-location-items` is fetched and the other
+sensors are computed locally so all of them reflect the same poll.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .const import VOLATILE_FIELDS
+
+CRITICAL_DAYS = 2  # items expiring within this many days are "critical"
+
+# location_type -> summary attribute
+SUMMARY_TYPE_KEYS = {
+    "freezer": "freezer_items",
+    "dry": "dry_items",
+    "emergency": "emergency_items",
+}
+
+
+def iter_locations(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    locations = data.get("locations")
+    if locations is None:
+        locations = (data.get("attributes") or {}).get("locations")
+    return locations or []
+
+
+def location_id(loc: Dict[str, Any]) -> Any:
+    return loc.get("id") or loc.get("location_id")
+
+
+def location_name(loc: Dict[str, Any]) -> Optional[str]:
+    return loc.get("location_name") or loc.get("name")
+
+
+def location_type(loc: Dict[str, Any]) -> Optional[str]:
+    return loc.get("location_type") or loc.get("type")
+
+
+def location_items(loc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    items = (loc.get("attributes") or {}).get("items")
+    if items is None:
+        items = loc.get("items")
+    return items or []
+
+
+def iter_items(data: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Yield (location, item) pairs."""
+    for loc in iter_locations(data):
+        for item in location_items(loc):
+            yield loc, item
+
+
+def without_volatile(data: Any) -> Any:
+    """Payload without its per-response timestamps (top level and `attributes`)."""
+    if not isinstance(data, dict):
+        return data
+    stable = {k: v for k, v in data.items() if k not in VOLATILE_FIELDS}
+    if isinstance(stable.get("attributes"), dict):
+        stable["attributes"] = {k: v for k, v in stable["attributes"].items() if k not in VOLATILE_FIELDS}
+    return stable
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def days_until(expires: Optional[str], today: date) -> Optional[int]:
+    expires_on = parse_date(expires)
+    return (expires_on - today).days if expires_on is not None else None
+
+
+class ExpiryIndex:
+    """Items of a location_items payload ordered by expiry date.
+
+    Rebuilt only when the payload object changes, so "expiring within N days"
+    for any N or day is a bisect over the cached order, not a rescan.
+    """
+
+    def __init__(self) -> None:
+        self._source: Optional[Dict[str, Any]] = None
+        self._dates: List[date] = []
+        self._entries: List[Tuple[date, Dict[str, Any], Dict[str, Any]]] = []
+
+    def update(self, data: Dict[str, Any]) -> None:
+        if data is self._source:
+            return
+        entries = []
+        for loc, item in iter_items(data):
+            expires_on = parse_date(item.get("expires"))
+            if expires_on is not None:
+                entries.append((expires_on, loc, item))
+        entries.sort(key=lambda e: e[0])
+        self._source = data
+        self._entries = entries
+        self._dates = [e[0] for e in entries]
+
+    def until(self, last_day: date) -> List[Tuple[date, Dict[str, Any], Dict[str, Any]]]:
+        """(expiry date, location, item) for everything expiring on or before `last_day`."""
+        return self._entries[: bisect_right(self._dates, last_day)]
+
+
+def _last_updated(data: Dict[str, Any]) -> Any:
+    return data.get("last_updated") or (data.get("attributes") or {}).get("last_updated")
+
+
+def derive_summary(data: Dict[str, Any], days_ahead: int, today: date) -> Dict[str, Any]:
+    counts = {key: 0 for key in SUMMARY_TYPE_KEYS.values()}
+    total = 0
+    expiring = 0
+    for loc, item in iter_items(data):
+        total += 1
+        if (key := SUMMARY_TYPE_KEYS.get(location_type(loc) or "")) is not None:
+            counts[key] += 1
+        days = days_until(item.get("expires"), today)
+        if days is not None and days <= days_ahead:
+            expiring += 1
+    return {
+        "state": total,
+        "attributes": {
+            "total_items": total,
+            "expiring_soon": expiring,
+            **counts,
+            "last_updated": _last_updated(data),
+            "unit_of_measurement": "items",
+        },
+    }
+
+
+def derive_expiring(
+    data: Dict[str, Any], days_ahead: int, today: date, index: Optional[ExpiryIndex] = None
+) -> Dict[str, Any]:
+    if index is None:
+        index = ExpiryIndex()
+    index.update(data)
+    items: List[Dict[str, Any]] = []
+    for expires_on, loc, item in index.until(date.fromordinal(today.toordinal() + days_ahead)):
+        days = (expires_on - today).days
+        items.append(
+            {
+                "name": item.get("name"),
+                "expires": item.get("expires"),
+                "location": location_name(loc),
+                "location_type": location_type(loc),
+                "days_until_expiry": days,
+                "quantity": item.get("quantity"),
+                "brand": item.get("brand"),
+                "urgency": "critical" if days <= CRITICAL_DAYS else "warning",
+            }
+        )
+    critical = sum(1 for x in items if x["urgency"] == "critical")
+    return {
+        "state": len(items),
+        "attributes": {
+            "items": items,
+            "critical_items": critical,
+            "warning_items": len(items) - critical,
+            "days_ahead": days_ahead,
+            "last_updated": _last_updated(data),
+            "unit_of_measurement": "items",
+        },
+    }
+
+
+def derive_location_status(data: Dict[str, Any], days_ahead: int, today: date) -> Dict[str, Any]:
+    locations: List[Dict[str, Any]] = []
+    total_items = 0
+    for loc in iter_locations(data):
+        items = location_items(loc)
+        expiring = 0
+        for item in items:
+            days = days_until(item.get("expires"), today)
+            if days is not None and days <= days_ahead:
+                expiring += 1
+        total_items += len(items)
+        status = {
+            "id": location_id(loc),
+            "name": location_name(loc),
+            "type": location_type(loc),
+            "total_items": len(items),
+            "expiring_items": expiring,
+            "note": loc.get("note"),
+        }
+        # Pass through fields the snapshot cannot compute
+        for key in ("utilization_percent", "last_restocked"):
+            if key in loc:
+                status[key] = loc[key]
+        locations.append(status)
+    return {
+        "state": len(locations),
+        "attributes": {
+            "total_locations": len(locations),
+            "total_items_all_locations": total_items,
+            "locations": locations,
+            "last_updated": _last_updated(data),
+            "unit_of_measurement": "locations",
+        },
+    }
+
+
+def item_quantities(data: Dict[str, Any]) -> Dict[str, float]:
+    """Quantity per item id (items without id or numeric quantity are skipped)."""
+    quantities: Dict[str, float] = {}
+    for _, item in iter_items(data):
+        if item.get("id") is None:
+            continue
+        try:
+            quantities[str(item["id"])] = float(item.get("quantity") or 0)
+        except (TypeError, ValueError):
+            continue
+    return quantities
+
+
+def consumed_quantity(previous: Dict[str, float], current: Dict[str, float]) -> float:
+    """Quantity that went away between two payloads (decreases and removed items)."""
+    return sum(max(0.0, qty - current.get(item_id, 0.0)) for item_id, qty in previous.items())
+
+
+def has_imminent_expiry(data: Dict[str, Any], today: date, within_days: int = 1) -> bool:
+    """True if any item (location_items or expiring payload) expires within `within_days`."""
+    items = [item for _, item in iter_items(data)]
+    items += (data.get("attributes") or {}).get("items") or []
+    for item in items:
+        days = days_until(item.get("expires"), today)
+        if days is not None and 0 <= days <= within_days:
+            return True
+    return False
@@ -0,0 +1,31 @@
+"""Fixtures shared by the Vorratskammer tests."""
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import aiohttp
+import pytest
+
+from bench.fake_supabase import FakeSupabase
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture
+async def fake_supabase(socket_enabled) -> AsyncIterator[FakeSupabase]:
+    """Local Supabase stand-in on 127.0.0.1 (the only host sockets may reach), served from the test's loop."""
+    server = FakeSupabase(20, locations=2)
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[aiohttp.ClientSession]:
+    async with aiohttp.ClientSession() as client:
+        yield client
@@ -0,0 +1,222 @@
+"""Retries, Retry-After, timeouts and circuit breakers of VorratskammerAPI against FakeSupabase."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from bench.fake_supabase import FakeSupabase
+from custom_components.vorratskammer import api as api_module
+from custom_components.vorratskammer.api import RefreshTokenInvalid, VorratskammerAPI
+from custom_components.vorratskammer.resilience import CircuitOpenError, TransientError
+
+SUMMARY = "/functions/v1/ha-inventory-summary"
+
+
+@pytest.fixture(autouse=True)
+def fast_resilience(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Millisecond backoff and breaker recovery so the tests stay fast."""
+    monkeypatch.setattr(api_module, "RETRY_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(api_module, "RETRY_BACKOFF_MAX", 0.02)
+    monkeypatch.setattr(api_module, "CIRCUIT_RECOVERY_TIMEOUT", 0.2)
+
+
+async def _api(
+    session: aiohttp.ClientSession, fake: FakeSupabase, **kwargs
+) -> VorratskammerAPI:
+    api = VorratskammerAPI(session, fake.url, "test-anon-key", **kwargs)
+    await api.login_password("test@example.com", "secret")
+    return api
+
+
+async def test_retries_transient_statuses(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=2)
+    fake_supabase.fail_next(503)
+    fake_supabase.fail_next(429)
+
+    data = await api.inventory_summary()
+
+    assert data["state"] == 20
+    assert fake_supabase.requests[SUMMARY] == 3
+    assert api.metrics.retries == 2
+    assert api.metrics.endpoint("ha-inventory-summary").retries == 2
+    assert api.breaker_states() == {"ha-inventory-summary": "closed"}
+
+
+async def test_gives_up_after_retries(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=1)
+    fake_supabase.fail_next(502, count=2)
+
+    with pytest.raises(TransientError) as err:
+        await api.inventory_summary()
+
+    assert err.value.status == 502
+    assert fake_supabase.requests[SUMMARY] == 2
+
+
+async def test_client_errors_are_not_retried(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=2)
+    fake_supabase.fail_next(400)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await api.inventory_summary()
+
+    assert fake_supabase.requests[SUMMARY] == 1
+    assert api.breaker_states() == {"ha-inventory-summary": "closed"}
+
+
+async def test_honours_retry_after(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=1)
+    fake_supabase.fail_next(429, retry_after="0.3")
+
+    started = time.monotonic()
+    data = await api.inventory_summary()
+
+    assert data["state"] == 20
+    assert time.monotonic() - started >= 0.3
+    assert fake_supabase.requests[SUMMARY] == 2
+
+
+async def test_long_retry_after_fails_without_waiting(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=2)
+    fake_supabase.fail_next(503, retry_after=str(api_module.RETRY_AFTER_MAX + 60))
+
+    started = time.monotonic()
+    with pytest.raises(TransientError) as err:
+        await api.inventory_summary()
+
+    assert err.value.retry_after > api_module.RETRY_AFTER_MAX
+    assert time.monotonic() - started < 1
+    assert fake_supabase.requests[SUMMARY] == 1
+
+
+async def test_timeout_is_retried(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, request_timeout=0.2, retries=1)
+    fake_supabase.fail_next(0, stall_s=1)
+
+    data = await api.inventory_summary()
+
+    assert data["state"] == 20
+    assert api.metrics.retries == 1
+
+
+async def test_timeout_without_retries(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, request_timeout=0.2, retries=0)
+    fake_supabase.fail_next(0, stall_s=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await api.inventory_summary()
+
+    assert api.metrics.endpoint("ha-inventory-summary").errors == 1
+
+
+async def test_breaker_opens_and_rejects_without_requests(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=0)
+    fake_supabase.fail_next(503, count=api_module.CIRCUIT_FAILURE_THRESHOLD)
+    for _ in range(api_module.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientError):
+            await api.inventory_summary()
+    assert api.breaker_states() == {"ha-inventory-summary": "open"}
+    sent = fake_supabase.requests[SUMMARY]
+
+    with pytest.raises(CircuitOpenError):
+        await api.inventory_summary()
+
+    assert fake_supabase.requests[SUMMARY] == sent
+    assert api.metrics.circuit_rejections == 1
+    # Other functions have their own breaker
+    assert (await api.location_status())["state"] == 2
+
+
+async def test_half_open_probe_failure_reopens(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=0)
+    fake_supabase.fail_next(503, count=api_module.CIRCUIT_FAILURE_THRESHOLD + 1)
+    for _ in range(api_module.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientError):
+            await api.inventory_summary()
+
+    await asyncio.sleep(0.25)
+    assert api.breaker_states() == {"ha-inventory-summary": "half_open"}
+    with pytest.raises(TransientError):
+        await api.inventory_summary()  # the probe fails
+
+    assert api.breaker_states() == {"ha-inventory-summary": "open"}
+    with pytest.raises(CircuitOpenError):
+        await api.inventory_summary()
+
+
+async def test_half_open_lets_one_probe_through(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=0)
+    fake_supabase.fail_next(503, count=api_module.CIRCUIT_FAILURE_THRESHOLD)
+    for _ in range(api_module.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientError):
+            await api.location_items()
+    await asyncio.sleep(0.25)
+    sent = fake_supabase.requests["/functions/v1/ha-location-items"]
+    fake_supabase.latency_s = 0.1
+
+    # Different params, so the calls are not coalesced; only the first may probe
+    probe = asyncio.create_task(api.location_items("a"))
+    await asyncio.sleep(0.02)
+    with pytest.raises(CircuitOpenError):
+        await api.location_items("b")
+    await probe
+
+    assert fake_supabase.requests["/functions/v1/ha-location-items"] == sent + 1
+    assert api.breaker_states() == {"ha-location-items": "closed"}
+    assert (await api.location_items("b"))["state"] == 2
+
+
+async def test_cancelled_probe_frees_the_half_open_slot(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase, retries=0)
+    fake_supabase.fail_next(503, count=api_module.CIRCUIT_FAILURE_THRESHOLD)
+    for _ in range(api_module.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(TransientError):
+            await api.location_items()
+    await asyncio.sleep(0.25)
+    fake_supabase.fail_next(0, stall_s=5)
+
+    probe = asyncio.create_task(api.location_items())
+    await asyncio.sleep(0.05)
+    api.cancel_pending()  # e.g. entry unload while the probe is in flight
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert api.breaker_states() == {"ha-location-items": "half_open"}
+    assert (await api.location_items())["state"] == 2
+    assert api.breaker_states() == {"ha-location-items": "closed"}
+
+
+async def test_expired_token_is_refreshed_once(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase)
+    fake_supabase.revoke_tokens()
+
+    results = await asyncio.gather(api.inventory_summary(), api.location_status())
+
+    assert [r["state"] for r in results] == [20, 2]
+    assert api.metrics.unauthorized == 2
+    assert api.metrics.token_refreshes == 1
+
+
+async def test_rejected_refresh_is_shared(session, fake_supabase: FakeSupabase) -> None:
+    api = await _api(session, fake_supabase)
+    logins = fake_supabase.requests["/auth/v1/token"]
+    fake_supabase.revoke_tokens()
+    fake_supabase.reject_tokens = True
+
+    results = await asyncio.gather(
+        api.inventory_summary(), api.location_status(), api.location_items(), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert fake_supabase.requests["/auth/v1/token"] == logins + 1
+    assert api.metrics.token_refresh_failures == 1
+
+    # The rejected refresh token is not sent to GoTrue again
+    with pytest.raises(RuntimeError):
+        await api.inventory_summary()
+    with pytest.raises(RefreshTokenInvalid):
+        await api.ensure_fresh_token(within=float("inf"))
+    assert fake_supabase.requests["/auth/v1/token"] == logins + 1
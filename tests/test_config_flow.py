@@ -0,0 +1,71 @@
+"""Re-authentication flow against FakeSupabase."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant import config_entries
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from bench.fake_supabase import FakeSupabase
+from custom_components.vorratskammer.const import (
+    CONF_ANON_KEY,
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_SUPABASE_URL,
+    DOMAIN,
+)
+
+
+def _entry(hass, fake: FakeSupabase) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_SUPABASE_URL: fake.url,
+            CONF_ANON_KEY: "test-anon-key",
+            CONF_EMAIL: "test@example.com",
+            "access_token": "revoked",
+            "refresh_token": "revoked",
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _start_reauth(hass, entry: MockConfigEntry):
+    return await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_REAUTH, "entry_id": entry.entry_id},
+        data=entry.data,
+    )
+
+
+async def test_reauth_stores_new_tokens(hass, fake_supabase: FakeSupabase) -> None:
+    entry = _entry(hass, fake_supabase)
+
+    result = await _start_reauth(hass, entry)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "reauth_confirm"
+
+    with patch.object(hass.config_entries, "async_reload", return_value=True) as reload:
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_PASSWORD: "secret"})
+
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "reauth_successful"
+    assert entry.data["access_token"] not in (None, "revoked")
+    assert entry.data["refresh_token"] not in (None, "revoked")
+    assert entry.data[CONF_ANON_KEY] == "test-anon-key"
+    reload.assert_called_once_with(entry.entry_id)
+
+
+async def test_reauth_rejected_password_shows_error(hass, fake_supabase: FakeSupabase) -> None:
+    entry = _entry(hass, fake_supabase)
+    fake_supabase.reject_tokens = True
+
+    result = await _start_reauth(hass, entry)
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_PASSWORD: "wrong"})
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "reauth_confirm"
+    assert result["errors"] == {"base": "auth"}
+    assert entry.data["access_token"] == "revoked"
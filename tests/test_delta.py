@@ -0,0 +1,150 @@
+"""LocationItemsIndex and delta_fetcher."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from bench.fake_supabase import FakeSupabase
+from custom_components.vorratskammer import delta as delta_module
+from custom_components.vorratskammer.api import VorratskammerAPI
+from custom_components.vorratskammer.delta import LocationItemsIndex, delta_fetcher
+from custom_components.vorratskammer.snapshot import iter_items, location_name
+
+LOCATION_ITEMS = "/functions/v1/ha-location-items"
+
+
+def _full() -> Dict[str, Any]:
+    return {
+        "state": 2,
+        "timestamp": "2025-01-01T00:00:00Z",
+        "locations": [
+            {"id": "fridge", "location_name": "Fridge", "attributes": {"items": [
+                {"id": 1, "name": "Milk", "quantity": 1, "location_id": "fridge"},
+                {"id": 2, "name": "Butter", "quantity": 2, "location_id": "fridge"},
+            ]}},
+            {"id": "cellar", "location_name": "Cellar", "attributes": {"items": [
+                {"id": 3, "name": "Potatoes", "quantity": 5, "location_id": "cellar"},
+            ]}},
+        ],
+    }
+
+
+def _placement(data: Dict[str, Any]) -> Dict[Any, tuple]:
+    return {item["id"]: (location_name(loc), item["quantity"]) for loc, item in iter_items(data)}
+
+
+@pytest.fixture
+def index() -> LocationItemsIndex:
+    index = LocationItemsIndex()
+    index.load_full(_full())
+    return index
+
+
+def test_load_full_enables_delta(index: LocationItemsIndex) -> None:
+    assert index.supported
+    assert index.cursor == "2025-01-01T00:00:00Z"
+    assert _placement(index.as_payload()) == {1: ("Fridge", 1), 2: ("Fridge", 2), 3: ("Cellar", 5)}
+
+
+def test_load_full_without_ids_keeps_delta_off() -> None:
+    data = _full()
+    del data["locations"][1]["attributes"]["items"][0]["id"]
+    index = LocationItemsIndex()
+    index.load_full(data)
+
+    assert not index.supported
+
+
+def test_insert_and_update(index: LocationItemsIndex) -> None:
+    changed = index.apply_delta({
+        "delta": True,
+        "cursor": "c2",
+        "items": [
+            {"id": 4, "name": "Eggs", "quantity": 6, "location_id": "fridge"},
+            {"id": 1, "name": "Milk", "quantity": 3, "location_id": "fridge"},
+        ],
+    })
+
+    assert changed
+    assert index.cursor == "c2"
+    assert _placement(index.as_payload()) == {
+        1: ("Fridge", 3), 2: ("Fridge", 2), 3: ("Cellar", 5), 4: ("Fridge", 6),
+    }
+
+
+def test_move_between_locations(index: LocationItemsIndex) -> None:
+    index.apply_delta({"delta": True, "items": [{"id": 2, "name": "Butter", "quantity": 2, "location_id": "cellar"}]})
+
+    payload = index.as_payload()
+    assert _placement(payload)[2] == ("Cellar", 2)
+    assert [loc["total_items"] for loc in payload["locations"]] == [1, 2]
+
+
+def test_delete_items_and_locations(index: LocationItemsIndex) -> None:
+    index.apply_delta({"delta": True, "deleted": [1], "deleted_locations": ["cellar"]})
+
+    payload = index.as_payload()
+    assert _placement(payload) == {2: ("Fridge", 2)}
+    assert payload["total_locations"] == 1
+
+
+def test_unchanged_delta_keeps_payload(index: LocationItemsIndex) -> None:
+    before = index.as_payload()
+
+    assert not index.apply_delta({"delta": True, "deleted": [99], "items": [{"id": 5, "location_id": "attic"}]})
+    assert index.as_payload() is before
+
+
+class _Backend:
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.delta: Dict[str, Any] = {"delta": True, "cursor": "c2", "items": []}
+
+    async def full(self) -> Dict[str, Any]:
+        self.calls.append("full")
+        return _full()
+
+    async def changes(self, cursor: str) -> Dict[str, Any]:
+        self.calls.append(f"changes:{cursor}")
+        return self.delta
+
+
+async def test_fetcher_applies_deltas_and_resyncs(monkeypatch: pytest.MonkeyPatch) -> None:
+    backend = _Backend()
+    clock = [1000.0]
+    monkeypatch.setattr(delta_module.time, "monotonic", lambda: clock[0])
+    fetch = delta_fetcher(backend.full, backend.changes, resync_interval_s=600)
+
+    await fetch()
+    backend.delta["items"] = [{"id": 3, "name": "Potatoes", "quantity": 4, "location_id": "cellar"}]
+    data = await fetch()
+    clock[0] += 600
+    resynced = await fetch()
+
+    assert backend.calls == ["full", "changes:2025-01-01T00:00:00Z", "full"]
+    assert _placement(data)[3] == ("Cellar", 4)
+    assert _placement(resynced)[3] == ("Cellar", 5)
+
+
+async def test_fetcher_falls_back_when_backend_rejects_updated_since(
+    session, fake_supabase: FakeSupabase
+) -> None:
+    api = VorratskammerAPI(session, fake_supabase.url, "test-anon-key", retries=0)
+    await api.login_password("test@example.com", "secret")
+    changes_calls: List[str] = []
+
+    async def changes(cursor: str) -> Dict[str, Any]:
+        changes_calls.append(cursor)
+        return await api.location_items_changes(cursor)
+
+    fetch = delta_fetcher(api.location_items, changes, resync_interval_s=3600)
+    await fetch()
+    fake_supabase.fail_next(400)
+
+    data = await fetch()
+    await fetch()
+
+    assert data["state"] == 2
+    assert len(changes_calls) == 1
+    assert fake_supabase.requests[LOCATION_ITEMS] == 4
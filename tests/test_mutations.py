@@ -0,0 +1,95 @@
+"""Local patches applied after the bulk item services."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from custom_components.vorratskammer.mutations import apply_add, apply_consume, apply_move
+from custom_components.vorratskammer.services import _with_generated_ids
+from custom_components.vorratskammer.snapshot import iter_items, location_id
+
+
+def _data() -> Dict[str, Any]:
+    return {
+        "state": 2,
+        "locations": [
+            {"id": "fridge", "location_name": "Fridge", "attributes": {"items": [
+                {"id": 1, "name": "Milk", "quantity": 2, "location_id": "fridge"},
+                {"id": 2, "name": "Butter", "quantity": 1, "location_id": "fridge"},
+            ]}},
+            {"id": "cellar", "location_name": "Cellar", "attributes": {"items": [
+                {"id": 3, "name": "Potatoes", "quantity": 5, "location_id": "cellar"},
+            ]}},
+        ],
+    }
+
+
+def _placement(data: Dict[str, Any]) -> Dict[Any, tuple]:
+    return {item["id"]: (location_id(loc), item["quantity"]) for loc, item in iter_items(data)}
+
+
+def test_consume_reduces_and_removes_at_zero() -> None:
+    data = _data()
+
+    patched = apply_consume(data, [{"id": 1, "quantity": 1}, {"id": 2, "quantity": 1}, {"id": 99}])
+
+    assert _placement(patched) == {1: ("fridge", 1), 3: ("cellar", 5)}
+    assert _placement(data)[2] == ("fridge", 1)  # the input is not modified
+    assert patched["locations"][1] is data["locations"][1]  # untouched locations are shared
+
+
+def test_add_restocks_an_existing_id() -> None:
+    patched = apply_add(_data(), [{"id": 3, "quantity": 2, "location_id": "cellar"}])
+
+    assert _placement(patched)[3] == ("cellar", 7)
+
+
+def test_add_new_item_and_unknown_location() -> None:
+    patched = apply_add(_data(), [
+        {"id": 4, "name": "Eggs", "quantity": 6, "location_id": "fridge"},
+        {"id": 5, "name": "Peas", "quantity": 1, "location_id": "attic"},
+    ])
+
+    assert _placement(patched) == {1: ("fridge", 2), 2: ("fridge", 1), 3: ("cellar", 5), 4: ("fridge", 6)}
+
+
+def test_unchanged_patch_returns_the_same_payload() -> None:
+    data = _data()
+
+    assert apply_add(data, [{"name": "Peas", "location_id": "attic"}]) is data
+    assert apply_move(data, [{"id": 1, "location_id": "attic"}]) is data
+
+
+def test_move_between_locations() -> None:
+    patched = apply_move(_data(), [{"id": 2, "location_id": "cellar"}])
+
+    assert _placement(patched) == {1: ("fridge", 2), 2: ("cellar", 1), 3: ("cellar", 5)}
+    moved = patched["locations"][1]["attributes"]["items"][-1]
+    assert moved["location_id"] == "cellar"
+
+    # Moved items are found under their new location by later patches
+    assert _placement(apply_consume(patched, [{"id": 2}])) == {1: ("fridge", 2), 3: ("cellar", 5)}
+
+
+def test_generated_ids_fill_only_missing_ids() -> None:
+    requested = [{"name": "Eggs", "quantity": 2, "location_id": "fridge"}, {"id": 3, "quantity": 1}]
+    echoed = {"items": [{"id": 7, "quantity": 12}, {"id": 3, "quantity": 6}]}
+
+    assert _with_generated_ids(requested, echoed) == [
+        {"id": 7, "name": "Eggs", "quantity": 2, "location_id": "fridge"},
+        {"id": 3, "quantity": 1},
+    ]
+
+
+def test_generated_ids_ignore_unmatched_responses() -> None:
+    requested = [{"name": "Eggs", "quantity": 2, "location_id": "fridge"}]
+
+    assert _with_generated_ids(requested, {"items": []}) is requested
+    assert _with_generated_ids(requested, {"ok": True}) is requested
+    assert _with_generated_ids(requested, None) is requested
+
+
+def test_restock_with_echoed_rows_adds_the_requested_quantity() -> None:
+    requested = [{"id": 3, "quantity": 2, "location_id": "cellar"}]
+    applied = _with_generated_ids(requested, {"items": [{"id": 3, "quantity": 7, "location_id": "cellar"}]})
+
+    assert _placement(apply_add(_data(), applied))[3] == ("cellar", 7)
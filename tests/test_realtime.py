@@ -0,0 +1,141 @@
+"""RealtimeClient against the FakeSupabase Realtime websocket."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from bench.fake_supabase import FakeSupabase
+from custom_components.vorratskammer import realtime as realtime_module
+from custom_components.vorratskammer.const import DOMAIN
+from custom_components.vorratskammer.realtime import TOPIC, RealtimeClient
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.changes: List[Optional[str]] = []
+        self.health: List[bool] = []
+
+
+async def _until(condition: Callable[[], bool], timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def recorder() -> _Recorder:
+    return _Recorder()
+
+
+@pytest.fixture
+async def client(hass, session, fake_supabase: FakeSupabase, recorder: _Recorder):
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    rt = RealtimeClient(
+        session,
+        fake_supabase.url,
+        "test-anon-key",
+        ["items", " locations", ""],
+        lambda: "access-1",
+        recorder.changes.append,
+        recorder.health.append,
+    )
+    rt.start(hass, entry)
+    yield rt
+    await rt.stop()
+
+
+def _joins(fake: FakeSupabase) -> List[Dict[str, Any]]:
+    return [m for m in fake.realtime_messages if m["event"] == "phx_join"]
+
+
+async def test_join_and_changes(client: RealtimeClient, fake_supabase: FakeSupabase, recorder: _Recorder) -> None:
+    await _until(lambda: client.healthy)
+
+    join = _joins(fake_supabase)[0]
+    assert join["topic"] == TOPIC
+    assert join["payload"]["access_token"] == "access-1"
+    assert join["payload"]["config"]["postgres_changes"] == [
+        {"event": "*", "schema": "public", "table": "items"},
+        {"event": "*", "schema": "public", "table": "locations"},
+    ]
+    assert recorder.health == [True]
+
+    await fake_supabase.push_change("items", "INSERT")
+    await _until(lambda: recorder.changes)
+    assert recorder.changes == ["items"]
+
+
+async def test_token_update_is_sent(client: RealtimeClient, fake_supabase: FakeSupabase) -> None:
+    await _until(lambda: client.healthy)
+
+    await client.update_token("access-2")
+
+    await _until(lambda: any(m["event"] == "access_token" for m in fake_supabase.realtime_messages))
+    update = next(m for m in fake_supabase.realtime_messages if m["event"] == "access_token")
+    assert update["topic"] == TOPIC
+    assert update["payload"] == {"access_token": "access-2"}
+
+
+async def test_rejected_subscription_is_unhealthy(
+    hass, session, fake_supabase: FakeSupabase, recorder: _Recorder, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(realtime_module, "RECONNECT_MIN", 0.05)
+    fake_supabase.reject_realtime = True
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    rt = RealtimeClient(
+        session, fake_supabase.url, "k", ["items"], lambda: None, recorder.changes.append, recorder.health.append
+    )
+    rt.start(hass, entry)
+    try:
+        await _until(lambda: _joins(fake_supabase))
+        await asyncio.sleep(0.05)
+        assert not rt.healthy
+        assert recorder.health == []
+    finally:
+        await rt.stop()
+
+
+async def test_reconnects_after_drop(
+    client: RealtimeClient, fake_supabase: FakeSupabase, recorder: _Recorder, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(realtime_module, "RECONNECT_MIN", 0.05)
+    await _until(lambda: client.healthy)
+
+    await fake_supabase.drop_realtime()
+
+    await _until(lambda: recorder.health[-2:] == [False, True] and len(_joins(fake_supabase)) == 2)
+    assert client.healthy
+
+
+async def test_heartbeat(
+    hass, session, fake_supabase: FakeSupabase, recorder: _Recorder, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(realtime_module, "HEARTBEAT_INTERVAL", 0.05)
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    rt = RealtimeClient(
+        session, fake_supabase.url, "k", ["items"], lambda: None, recorder.changes.append, recorder.health.append
+    )
+    rt.start(hass, entry)
+    try:
+        await _until(lambda: any(m["event"] == "heartbeat" for m in fake_supabase.realtime_messages))
+        beat = next(m for m in fake_supabase.realtime_messages if m["event"] == "heartbeat")
+        assert beat["topic"] == "phoenix"
+    finally:
+        await rt.stop()
+
+
+async def test_stop_ends_the_entry_task(hass, client: RealtimeClient, fake_supabase: FakeSupabase) -> None:
+    await _until(lambda: client.healthy)
+    task = client._task
+    assert task is not None and not task.done()
+
+    await client.stop()
+
+    assert task.done()
+    assert not client.healthy
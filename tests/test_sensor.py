@@ -0,0 +1,66 @@
+"""Attributes of the aggregate location_items sensor for both payload shapes."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from custom_components.vorratskammer.sensor import VorratskammerGenericSensor
+
+
+def _sensor(data: Dict[str, Any]) -> VorratskammerGenericSensor:
+    coordinator = SimpleNamespace(data=data, stale=False)
+    return VorratskammerGenericSensor(coordinator, "entry", "location_items", "Pantry", "locations", "mdi:fridge")
+
+
+def _nested() -> Dict[str, Any]:
+    """The documented shape: locations under `attributes`, `type` and `items` per location."""
+    return {
+        "state": 2,
+        "attributes": {
+            "last_updated": "2025-01-01T00:00:00Z",
+            "locations": [
+                {"id": "b", "name": "Cellar", "type": "dry", "items": [
+                    {"id": 3, "name": "Rice", "expires": "2026-01-01"},
+                ]},
+                {"id": "a", "name": "Freezer", "type": "freezer", "items": [
+                    {"id": 1, "name": "Peas", "expires": None},
+                    {"id": 2, "name": "Fish", "expires": "2025-02-01"},
+                ]},
+            ],
+        },
+    }
+
+
+def test_nested_payload_shape() -> None:
+    sensor = _sensor(_nested())
+
+    attrs = sensor.extra_state_attributes
+
+    assert sensor.native_value == 2
+    assert attrs["last_updated"] == "2025-01-01T00:00:00Z"
+    assert "attributes" not in attrs
+    assert attrs["locations"] == [
+        {"name": "Cellar", "location_type": "dry", "total_items": 1},
+        {"name": "Freezer", "location_type": "freezer", "total_items": 2},
+    ]
+    assert [(i["name"], i["location"], i["location_type"]) for i in attrs["all_items_sorted"]] == [
+        ("Rice", "Cellar", "dry"), ("Fish", "Freezer", "freezer"), ("Peas", "Freezer", "freezer"),
+    ]
+    assert attrs["all_items_count"] == 3
+    assert not attrs["all_items_truncated"]
+
+
+def test_top_level_payload_with_null_attributes() -> None:
+    sensor = _sensor({
+        "total_locations": 1,
+        "locations": [
+            {"id": "a", "location_name": "Fridge", "location_type": "fridge", "attributes": None},
+            {"id": "b", "location_name": "Shelf", "location_type": "dry", "attributes": {"items": [{"id": 1}]}},
+        ],
+    })
+
+    attrs = sensor.extra_state_attributes
+
+    assert sensor.native_value == 1
+    assert [loc["total_items"] for loc in attrs["locations"]] == [0, 1]
+    assert attrs["all_items_sorted"] == [{"id": 1, "location": "Shelf", "location_type": "dry"}]